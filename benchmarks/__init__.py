@@ -0,0 +1,12 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+"""
+Benchmarks for spotting the performance regressions. Run them with:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --output new.json --compare results.json
+
+"""
@@ -0,0 +1,90 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import random
+
+
+"""
+Seeded generators of the synthetic equations. Each generator takes the I, O and C of a
+family, the size and the seed, and returns the same term for the same arguments.
+"""
+
+
+def _nodes(rng: random.Random, count: int, node_count: int) -> list:
+    return rng.sample(range(node_count), min(count, node_count))
+
+
+def wide_product(I, O, C, size: int, seed: int = 0):
+    """
+    Two wide node sets connected to each other, size * size operations
+    """
+    rng = random.Random(seed)
+    return C(*_nodes(rng, size, 4 * size)) * C(*_nodes(rng, size, 4 * size))
+
+
+def deep_chain(I, O, C, size: int, seed: int = 0, width: int = 3):
+    """
+    A chain of size products of small node sets
+    """
+    rng = random.Random(seed)
+    term = C(*_nodes(rng, width, 4 * size))
+    for _ in range(size - 1):
+        term = term * C(*_nodes(rng, width, 4 * size))
+    return term
+
+
+def big_sum(I, O, C, size: int, seed: int = 0):
+    """
+    A sum of size single operation products
+    """
+    rng = random.Random(seed)
+    term = C(rng.randrange(4 * size)) * C(rng.randrange(4 * size))
+    for _ in range(size - 1):
+        term = term + C(rng.randrange(4 * size)) * C(rng.randrange(4 * size))
+    return term
+
+
+def with_discards(I, O, C, size: int, seed: int = 0):
+    """
+    A wide product with every other of its size sources discarded one by one
+    """
+    rng = random.Random(seed)
+    sources = _nodes(rng, size, 4 * size)
+    term = C(*sources) * C(*_nodes(rng, size, 4 * size))
+    for source in sources[::2]:
+        term = term - C(source)
+    return term
+
+
+def identity_heavy(I, O, C, size: int, seed: int = 0):
+    """
+    A product of size optional parts, (C(x) + I), ending with parts terminated by O
+    """
+    rng = random.Random(seed)
+    term = C(*_nodes(rng, 2, 4 * size))
+    for _ in range(size):
+        term = term * (C(*_nodes(rng, 2, 4 * size)) + I)
+    return term * (C(rng.randrange(4 * size)) + O * C(rng.randrange(4 * size)))
+
+
+def simplifiable(I, O, C, size: int, seed: int = 0):
+    """
+    A sum of size products sharing the sink, which simplify can factor out
+    """
+    rng = random.Random(seed)
+    sink = C(rng.randrange(4 * size))
+    term = C(rng.randrange(4 * size)) * sink
+    for _ in range(size - 1):
+        term = term + C(rng.randrange(4 * size)) * sink
+    return term
+
+
+GENERATORS = {
+    'wide_product': wide_product,
+    'deep_chain': deep_chain,
+    'big_sum': big_sum,
+    'with_discards': with_discards,
+    'identity_heavy': identity_heavy,
+    'simplifiable': simplifiable}
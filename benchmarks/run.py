@@ -0,0 +1,202 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import category_equations
+from category_equations import from_operator, EquationMap, simplify, get_route
+
+from .generators import GENERATORS
+
+
+"""
+Times the term algebra, the comparison, the printing, the evaluation and the searches on
+the generated equations and writes the results as JSON.
+"""
+
+
+def _noop(source, sink):
+    pass
+
+
+def _measure(setup, action, repeat: int) -> float:
+    """
+    The best time of the action over the repeats. The setup is run before each repeat
+    outside the timing, because the terms cache their operations.
+    """
+    best = None
+    for _ in range(repeat):
+        argument = setup()
+        started = time.perf_counter()
+        action(argument)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def _term_benchmarks(generator, size: int, seed: int):
+    I, O, C = from_operator(_noop)
+
+    def build():
+        return generator(I, O, C, size, seed)
+
+    def computed(term):
+        # the terms compute their sinks, sources and operations on the first access
+        term.sinks, term.operations
+        return term
+
+    def pair():
+        return (
+            computed(generator(I, O, C, size, seed)),
+            computed(generator(I, O, C, size, seed + 1)))
+
+    return {
+        'build': (lambda: None, lambda _: computed(build())),
+        'add': (pair, lambda terms: (terms[0] + terms[1]).operations),
+        'discard': (pair, lambda terms: (terms[0] - terms[1]).operations),
+        'arrow': (pair, lambda terms: (terms[0] * terms[1]).operations),
+        'equal': (
+            lambda: (computed(build()), computed(build())),
+            lambda terms: terms[0] == terms[1]),
+        'str': (build, str),
+        'evaluate': (lambda: computed(build()), lambda term: term.evaluate())}
+
+
+def _search_benchmarks(generator, size: int, seed: int, max_iterations: int):
+    I, O, C = from_operator(_noop)
+
+    def setup():
+        term = generator(I, O, C, size, seed)
+        target, _ = simplify(term, max_iterations, EquationMap(I, O, C))
+        return term, target, EquationMap(I, O, C)
+
+    return {
+        'simplify': (setup, lambda args: simplify(args[0], max_iterations, args[2])),
+        'get_route': (setup, lambda args: get_route(args[0], args[1], max_iterations, args[2]))}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+        sizes=(8, 32, 128),
+        search_sizes=(2, 3),
+        repeat: int = 3,
+        seed: int = 0,
+        max_iterations: int = 64,
+        generators=None,
+        progress=None) -> dict:
+    """
+    Runs the benchmarks and returns the results as a dict, which can be written as JSON.
+    The searches are run only on the simplifiable equations of the search_sizes, as they
+    are exponential in the size.
+    """
+    names = sorted(GENERATORS) if generators is None else list(generators)
+    results = []
+
+    def record(name: str, size: int, cases: dict):
+        for case, (setup, action) in cases.items():
+            seconds = _measure(setup, action, repeat)
+            result = {
+                'benchmark': '{}.{}.{}'.format(name, case, size),
+                'generator': name,
+                'operation': case,
+                'size': size,
+                'seconds': seconds}
+            results.append(result)
+            if progress is not None:
+                progress(result)
+
+    for name in names:
+        for size in sizes:
+            record(name, size, _term_benchmarks(GENERATORS[name], size, seed))
+    if 'simplifiable' in names:
+        for size in search_sizes:
+            record(
+                'simplifiable', size,
+                _search_benchmarks(GENERATORS['simplifiable'], size, seed, max_iterations))
+
+    return {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'package': category_equations.__name__,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results}
+
+
+def compare(old: dict, new: dict, threshold: float = 1.2) -> list:
+    """
+    Pairs the benchmarks of the two runs and returns (benchmark, old seconds, new
+    seconds, ratio, regressed) -tuples. A benchmark regressed, when the new time is more
+    than threshold times the old one.
+    """
+    old_seconds = {result['benchmark']: result['seconds'] for result in old['results']}
+    compared = []
+    for result in new['results']:
+        before = old_seconds.get(result['benchmark'], None)
+        if before is None:
+            continue
+        ratio = result['seconds'] / before if before > 0 else float('inf')
+        compared.append((result['benchmark'], before, result['seconds'], ratio, ratio > threshold))
+    return compared
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of category_equations')
+    parser.add_argument('--output', help='the JSON file for the results')
+    parser.add_argument('--compare', help='the JSON file of an earlier run')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--search-sizes', type=int, nargs='+', default=[2, 3])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-iterations', type=int, default=64)
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS))
+    arguments = parser.parse_args(argv)
+
+    def progress(result):
+        print('{:<40} {:>12.6f}'.format(result['benchmark'], result['seconds']), file=sys.stderr)
+
+    results = run(
+        sizes=arguments.sizes,
+        search_sizes=arguments.search_sizes,
+        repeat=arguments.repeat,
+        seed=arguments.seed,
+        max_iterations=arguments.max_iterations,
+        generators=arguments.generators,
+        progress=progress)
+    if arguments.output:
+        with open(arguments.output, 'w') as stream:
+            json.dump(results, stream, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    if not arguments.compare:
+        return 0
+    with open(arguments.compare) as stream:
+        old = json.load(stream)
+    regressed = False
+    for benchmark, before, after, ratio, slower in compare(old, results, arguments.threshold):
+        regressed = regressed or slower
+        print('{:<40} {:>12.6f} {:>12.6f} {:>7.2f}{}'.format(
+            benchmark, before, after, ratio, ' REGRESSED' if slower else ''), file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
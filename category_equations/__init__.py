@@ -6,7 +6,9 @@
 
 """
 
-from .operation import FreezedOperation, OperationsSet
+from .operation import FreezedOperation, OperationsSet, BitOperationsSet
+from .cache import LRUCache
+from .nodes import CompactNodes, NodeRange, NodeArray, BitSet, IntDomain
 from .category import Category
 from .processed_term import IPrintableTerm, CategoryOperations, ProcessedTerm
 
@@ -15,16 +17,30 @@ from .term import(
     EquationTerm,
     Identity,
     Zero,
-    Adder)
+    Adder,
+    CompactTerm,
+    SubtermTable)
 
 
 
+from .encoding import encode_term, decode_term, family, canonical_form, term_digest
+from .store import SimplificationStore
+from .synthesis import synthesize
+from .plan import EvaluationPlan, compile_term
+from .evaluation import evaluate_many
+from .journal import EvaluationJournal
+from .instrumentation import SearchStats, EvaluationProfiler
+from .memory import memory_report, trace_construction
+
 from .analysis import (
     TermIs,
     Get,
     Equal,
     EquationMap,
     simplify,
+    simplify_many,
+    simplify_components,
+    share_subterms,
     get_route)
 
 def debug(source, sink):
@@ -32,7 +48,7 @@ def debug(source, sink):
 
 def get_I_and_O(operator): return Identity(operator), Zero(operator)
 
-def from_operator(operation=debug):
+def from_operator(operation=debug, keep_history=True, domain=None):
     """
 # python-category-equations
 
@@ -235,6 +251,16 @@ Note that the comparison won't work without the O -term because the sinks differ
     >>> C(1) * C(2) * C(4) +  C(3) * C(4) == C(1) * ( C(2) + O * C(3) ) * C(4)
     False
 
+If you only build and evaluate the equations, the history of the terms can be dropped.
+Then the intermediate results can be garbage collected while the equation is built:
+
+    >>> I, O, C = from_operator(debug, keep_history=False)
+    >>> a = C(1, 2) * ( C(3, 4) + I ) * C(5)
+    >>> a
+    T(sinks=2, sources=1, operations=8)
+    >>> a == C(1,2) * C(3,4) * C(5) + C(1,2) * C(5)
+    True
+
 ## Equation solving and minimizations
 
 The module contains also (quite inefficient) simplify -method, which can be used to expression minimization:
@@ -277,13 +303,7 @@ For proofs use the `get_route`:
 
     """
 
-    _I, _O = get_I_and_O(operation)
-
-
-    def _C(*things):
-        return Adder(operator=operation, items=set(things))
-
-    return _I, _O, _C
+    return family(operation, keep_history, domain)
 
 
 __all__ = [
@@ -298,11 +318,37 @@ __all__ = [
     'Identity',
     'Zero',
     'Adder',
+    'CompactTerm',
+    'SubtermTable',
+    'share_subterms',
     'TermIs',
     'Get',
     'Equal',
     'EquationMap',
     'simplify',
+    'simplify_many',
+    'simplify_components',
     'get_route',
     'OperationsSet',
-    'FreezedOperation']
+    'BitOperationsSet',
+    'FreezedOperation',
+    'LRUCache',
+    'CompactNodes',
+    'NodeRange',
+    'NodeArray',
+    'BitSet',
+    'IntDomain',
+    'encode_term',
+    'decode_term',
+    'canonical_form',
+    'term_digest',
+    'SimplificationStore',
+    'synthesize',
+    'EvaluationPlan',
+    'compile_term',
+    'evaluate_many',
+    'EvaluationJournal',
+    'SearchStats',
+    'EvaluationProfiler',
+    'memory_report',
+    'trace_construction']
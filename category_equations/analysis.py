@@ -5,8 +5,15 @@
 
 """
 
-from heapq import heappop, heappush
-
+import time
+from contextlib import contextmanager
+from heapq import heappop, heappush, nsmallest
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cache import LRUCache
+from .encoding import encode_postfix, decode_postfix, family, term_digest
+from .store import SimplificationStore
+from .instrumentation import SearchStats
 from .term import (
     CategoryOperations,
     ProcessedTerm,
@@ -14,7 +21,8 @@ from .term import (
     CategoryOperations,
     Identity,
     Adder,
-    MediateTerm)
+    MediateTerm,
+    SubtermTable)
 
 class TermIs:
 
@@ -65,12 +73,7 @@ class Get:
                 operation=term.processed_term.operation,
                 source = term.processed_term.source)
 
-            return MediateTerm(
-                operator=term.operator,
-                sources=term.sources,
-                sinks=term.sinks,
-                operations=term.operations,
-                processed_term=processed_term)
+            return term.rewritten(processed_term)
 
         def replace_source(manipulator):
             new_source = manipulator(term.processed_term.source)
@@ -81,12 +84,7 @@ class Get:
                 operation=term.processed_term.operation,
                 source = new_source)
 
-            return MediateTerm(
-                operator=term.operator,
-                sources=term.sources,
-                sinks=term.sinks,
-                operations=term.operations,
-                processed_term=processed_term)
+            return term.rewritten(processed_term)
 
         for child_operation in Get.replacers(term.processed_term.sink):
             def replace_in_sink(manipulator):
@@ -135,6 +133,25 @@ class Get:
         all_terms_l.sort()
         return all_terms_l
 
+    @staticmethod
+    def repeated_terms(term: IEquationTerm) -> list:
+        """
+        Lists the structurally same subterms, which are written more than once, with
+        their counts:
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C(1, 2) * C(3, 4) + C(1, 2) * C(3, 4) * C(5)
+        >>> for i, count in Get.repeated_terms(a):
+        ...   print(i, count)
+        C(1, 2) 2
+        C(1, 2) * C(3, 4) 2
+        C(3, 4) 2
+
+        """
+        table = SubtermTable()
+        table.canonical(term)
+        return sorted(table.repeated())
+
     @staticmethod
     def tail_products(term: IEquationTerm):
         """
@@ -176,11 +193,15 @@ class Get:
         C(2) * C(3)
         C(1) * C(3) * C(4)
 
+        >>> for i in Get.topmost_sums((C(1) - C(2)) + C(3)):
+        ...   print(i)
+        C(1) - C(2)
+        C(3)
 
         """
         if TermIs.terminal(term):
             yield term
-        if TermIs.arrow(term):
+        if TermIs.arrow(term) or TermIs.discard(term):
             yield term
         if TermIs.add(term):
             yield from Get.topmost_sums(term.processed_term.sink)
@@ -203,6 +224,60 @@ class Get:
         for sub_term in Get.topmost_sums(term):
             yield from Get.tail_products(sub_term)
 
+    @staticmethod
+    def components(term: IEquationTerm) -> list:
+        """
+        Splits the topmost sums to the groups, which do not share any nodes with each other.
+        The summands without any nodes are put to the first group.
+
+        >>> I, O, C = from_operator(debug)
+        >>> for component in Get.components(C(1) * C(2) + C(3) * C(4) + C(2) * C(5) + O):
+        ...   print(component)
+        [C(1) * C(2), C(2) * C(5), O]
+        [C(3) * C(4)]
+
+        """
+        parents = {}
+
+        def find(node):
+            root = node
+            while parents[root] is not root:
+                root = parents[root]
+            while parents[node] is not root:
+                parents[node], node = root, parents[node]
+            return root
+
+        summands = list(Get.topmost_sums(term))
+        summand_nodes = []
+        for summand in summands:
+            nodes = set(summand.sinks)
+            nodes.update(summand.sources)
+            for operation in summand.operations:
+                nodes.add(operation.source)
+                nodes.add(operation.sink)
+            summand_nodes.append(nodes)
+            first = None
+            for node in nodes:
+                if node not in parents:
+                    parents[node] = node
+                if first is None:
+                    first = find(node)
+                else:
+                    parents[find(node)] = first
+
+        groups = {}
+        empty = []
+        for summand, nodes in zip(summands, summand_nodes):
+            if not nodes:
+                empty.append(summand)
+                continue
+            groups.setdefault(find(next(iter(nodes))), []).append(summand)
+        components = list(groups.values())
+        if not components:
+            return [empty]
+        components[0].extend(empty)
+        return components
+
     @staticmethod
     def head(term: IEquationTerm) -> IEquationTerm:
         """
@@ -240,6 +315,29 @@ class Get:
             return term.processed_term.source
         return None
 
+def share_subterms(term: IEquationTerm, table: SubtermTable = None) -> IEquationTerm:
+    """
+    Rewrites the term so that the structurally same subterms are the same objects. The
+    table can be shared between the terms to share the subterms between them too.
+
+    >>> I, O, C = from_operator(debug)
+    >>> a = C(1, 2) * C(3, 4) + C(1, 2) * C(3, 4) * C(5)
+    >>> b = share_subterms(a)
+    >>> b
+    C(1, 2) * C(3, 4) + C(1, 2) * C(3, 4) * C(5)
+    >>> b == a
+    True
+    >>> b.processed_term.sink is b.processed_term.source.processed_term.sink
+    True
+    >>> b.stats()
+    {'terms': 9, 'objects': 6, 'unique': 6, 'duplicated': 0}
+
+    """
+    if table is None:
+        table = SubtermTable()
+    return table.canonical(term)
+
+
 class Equal:
     @staticmethod
     def sink_out(term: IEquationTerm, I: Identity) -> IEquationTerm:
@@ -459,7 +557,54 @@ class Equal:
                 return head.combine(tail)
         return None
 
+    @staticmethod
+    def distribute_sink(term: IEquationTerm) -> IEquationTerm:
+        """
+        The inverse of the sink_out for the sums:
+
+        >>> I, O, C = from_operator(debug)
+
+        >>> Equal.distribute_sink(C(1) * (I * C(2) + I * C(3)))
+        C(1) * I * C(2) + C(1) * I * C(3)
+
+        >>> Equal.distribute_sink(C(1) * C(2))
+
+        """
+        if TermIs.arrow(term) and TermIs.add(term.processed_term.source):
+            sink = term.processed_term.sink
+            source = term.processed_term.source
+            returned = sink * source.processed_term.sink + sink * source.processed_term.source
+            if returned == term:
+                return returned
+        return None
+
+    @staticmethod
+    def distribute_source(term: IEquationTerm) -> IEquationTerm:
+        """
+        The inverse of the source_out for the sums:
+
+        >>> I, O, C = from_operator(debug)
+
+        >>> Equal.distribute_source((C(1) * I + C(2) * I) * C(3))
+        C(1) * I * C(3) + C(2) * I * C(3)
+
+        >>> Equal.distribute_source(C(1) * C(2))
+
+        """
+        if TermIs.arrow(term) and TermIs.add(term.processed_term.sink):
+            sink = term.processed_term.sink
+            source = term.processed_term.source
+            returned = sink.processed_term.sink * source + sink.processed_term.source * source
+            if returned == term:
+                return returned
+        return None
+
+_NO_RESULT = object()
+
+
 class EquationMapItem:
+    __slots__ = ('term',)
+
     def __init__(self,term):
         self.term = term
     def as_tuple(self):
@@ -484,13 +629,63 @@ class EquationMapItem:
 
 
 class EquationMap:
-    def __init__(self, I, O, C, manipulations: list = None):
+    def __init__(
+            self,
+            I,
+            O,
+            C,
+            manipulations: list = None,
+            max_cache_size: int = None,
+            max_rule_cache_size: int = None,
+            inverse_manipulations: list = None,
+            store: SimplificationStore = None,
+            rules_name: str = None):
         """
         >>> I, O, C = from_operator(debug)
         >>> a = C(1) + C(2)
         >>> m = EquationMap(I, O, C)
         >>> len(m.manipulations)
         8
+        >>> len(m.inverse_manipulations)
+        2
+
+        The caches can be bounded. The least recently used entries are evicted first:
+
+        >>> m = EquationMap(I, O, C, max_cache_size=8, max_rule_cache_size=32)
+        >>> nodes = list(m.neighbor_nodes(a))
+        >>> nodes = list(m.neighbor_nodes(a))
+        >>> stats = m.cache_stats()
+        >>> stats['nodes']['size'] <= 8 and stats['nodes']['evictions'] > 0
+        True
+        >>> stats['rules']['size'] <= 32 and stats['rules']['hits'] > 0
+        True
+
+        The results of simplify and get_route can be persisted with a SimplificationStore.
+        Then the same search with the same arguments is done only once:
+
+        >>> import os, tempfile
+        >>> store = SimplificationStore(os.path.join(tempfile.mkdtemp(), 'store.sqlite'))
+        >>> m = EquationMap(I, O, C, store=store)
+        >>> simplify(C(1) + C(2), 300, m)
+        (C(1, 2), [C(1) + C(2), C(1, 2)])
+        >>> simplify(C(1) + C(2), 300, EquationMap(I, O, C, store=store))
+        (C(1, 2), [C(1) + C(2), C(1, 2)])
+        >>> store.stats()['hits']
+        1
+
+        The stored results are keyed by the rules too. The default manipulations are named
+        'default' and the other rules can be named with the rules_name. The results of the
+        maps with unnamed custom rules are not stored. The results of the searches stopped
+        by their deadline are not stored either:
+
+        >>> m = EquationMap(I, O, C, manipulations=[], store=store)
+        >>> simplify(C(3) + C(4), 300, m)
+        (C(3) + C(4), [C(3) + C(4)])
+        >>> simplify(C(3) + C(4), 300, EquationMap(I, O, C, store=store), deadline=0.0)
+        (C(3) + C(4), [C(3) + C(4)])
+        >>> simplify(C(3) + C(4), 300, EquationMap(I, O, C, store=store))
+        (C(3, 4), [C(3) + C(4), C(3, 4)])
+
 
         """
         self.I, self.O, self.C = I, O, C
@@ -507,8 +702,51 @@ class EquationMap:
                 lambda term: Equal.source_out(term, I)]
         else:
             self.manipulations = manipulations
-        self._node_cache = {}
-    
+        self.default_manipulations = manipulations is None
+        self.rules_name = 'default' if manipulations is None and inverse_manipulations is None \
+            else rules_name
+
+        if inverse_manipulations is None:
+            # the rest of the default manipulations are inverses of each other
+            inverse_manipulations = [
+                Equal.distribute_sink,
+                Equal.distribute_source] if manipulations is None else []
+        self.inverse_manipulations = inverse_manipulations
+        self._rules = self.manipulations + self.inverse_manipulations
+        self._node_cache = LRUCache(max_cache_size)
+        self._rule_cache = LRUCache(max_rule_cache_size)
+        self.store = store
+        # the SearchStats of the running search
+        self.stats = None
+
+    def result_key(self, search: str, *parts) -> str:
+        """
+        The key of the stored result of the search with the parts or None, if the results
+        are not stored
+        """
+        if self.store is None or self.rules_name is None:
+            return None
+        return term_digest(search, self.rules_name, *parts)
+
+    def load_result(self, key: str):
+        """
+        Returns the stored (term, path) -tuple for the key or None.
+        """
+        if self.store is None or key is None:
+            return None
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        encoded, encoded_path = stored
+        return (
+            decode_postfix(encoded, self.I, self.O, self.C),
+            [decode_postfix(step, self.I, self.O, self.C) for step in encoded_path])
+
+    def save_result(self, key: str, term, path: list):
+        if self.store is None or key is None:
+            return
+        self.store.put(key, (encode_postfix(term), [encode_postfix(step) for step in path]))
+
     def get_cached(self, x):
         if x is None:
             return None
@@ -520,11 +758,50 @@ class EquationMap:
         if cached is not None:
             return cached
         else:
-            self._node_cache[new_cached] = new_cached
+            self._node_cache.put(new_cached, new_cached)
             return new_cached
-        
+
+    def apply_cached(self, rule_id: int, term):
+        """
+        Applies the manipulation number rule_id to the term and memoizes the result
+        on the (rule_id, term) pair. The inverse manipulations are numbered after the
+        manipulations.
+
+        >>> I, O, C = from_operator(debug)
+        >>> m = EquationMap(I, O, C)
+        >>> m.apply_cached(2, C(1) + C(2))
+        C(1, 2)
+        >>> m.apply_cached(2, C(1) + C(2))
+        C(1, 2)
+        >>> m.apply_cached(2, C(1) * C(2)) is None
+        True
+        >>> m.cache_stats()['rules']['hits']
+        1
+
+        """
+        key = (rule_id, self.get_cached(term))
+        cached = self._rule_cache.get(key, _NO_RESULT)
+        if cached is not _NO_RESULT:
+            return cached
+        if self.stats is None:
+            returned = self._rules[rule_id](term)
+        else:
+            started = time.perf_counter()
+            returned = self._rules[rule_id](term)
+            self.stats.rule_applied(rule_id, time.perf_counter() - started, returned is not None)
+        if returned is not None:
+            returned = self.get_cached(returned).term
+        self._rule_cache.put(key, returned)
+        return returned
+
     def clear_cache(self):
-        self._node_cache = {}
+        self._node_cache.clear()
+        self._rule_cache.clear()
+
+    def cache_stats(self) -> dict:
+        return {
+            'nodes': self._node_cache.stats(),
+            'rules': self._rule_cache.stats()}
 
     def dist_between(self, x, y):
         """
@@ -557,7 +834,7 @@ class EquationMap:
         return max(len_str_x, len_str_y) - diff_point
 
     
-    def neighbor_nodes(self, x):
+    def neighbor_nodes(self, x, inverse: bool = False):
         """
         >>> I, O, C = from_operator(debug)
         >>> a = C(1) + C(2)
@@ -594,13 +871,11 @@ class EquationMap:
 
         """
         x = self.get_cached(x)
-        
-        for manipulation in self.manipulations:
+
+        rule_count = len(self._rules) if inverse else len(self.manipulations)
+        for rule_id in range(rule_count):
             def cached_manipulation(term):
-                returned = manipulation(term)
-                if returned is None:
-                    return None
-                return self.get_cached(returned).term
+                return self.apply_cached(rule_id, term)
 
             for replacer in Get.replacers(x.term):
                 returned = replacer(cached_manipulation)
@@ -609,7 +884,260 @@ class EquationMap:
                     yield self.get_cached(returned)
 
 
-def simplify(term: IEquationTerm, max_iterations = 1024, equation_map=None):
+def _best_first_search(
+        start: EquationMapItem,
+        score,
+        max_iterations: int,
+        equation_map: EquationMap,
+        stop_at: float = None,
+        on_improvement=None,
+        beam_width: int = None,
+        executor: ProcessPoolExecutor = None,
+        batch_size: int = 1,
+        stats: SearchStats = None):
+    """
+    Expands the nodes with the smallest score first and returns the best scored node with
+    the came_from -mapping needed for the path reconstruction. The search stops at the
+    time.monotonic() time stop_at. With an executor up to batch_size nodes are popped per
+    round and expanded in the worker processes.
+    """
+    if executor is None:
+        def expand(nodes):
+            return [equation_map.neighbor_nodes(node) for node in nodes]
+    else:
+        expand = _parallel_expansion(equation_map, executor)
+
+    closedset = set([])
+    best = (score(start), start)
+    scoreHeap = [best]
+    came_from = {}
+
+    iteration_count = 0
+    while any(scoreHeap) and iteration_count < max_iterations: # is not empty
+        if stop_at is not None and time.monotonic() >= stop_at:
+            break
+        popped = []
+        while any(scoreHeap) and iteration_count < max_iterations and len(popped) < batch_size:
+            iteration_count += 1
+            x = heappop(scoreHeap)
+            closedset.add(x[1])
+            popped.append(x[1])
+
+        for x, neighbors in zip(popped, expand(popped)):
+            neighbornodes =  [
+                (score(node_y), node_y )
+                for node_y in neighbors if node_y is not None
+                ]
+            #better sort here than update the heap
+            neighbornodes.sort()
+
+            duplicates = 0
+            for item in neighbornodes:
+                y = item[1]
+                if y in closedset:
+                    duplicates += 1
+                    continue
+
+                came_from[y] = x
+
+                heappush(scoreHeap, item)
+                if item < best:
+                    best = item
+                    if on_improvement is not None:
+                        on_improvement(y.term, item[0])
+                    if stats is not None:
+                        stats.improved(y.term, item[0])
+            if stats is not None:
+                stats.expanded(len(neighbornodes), duplicates, len(scoreHeap))
+
+        if beam_width is not None and len(scoreHeap) > beam_width:
+            scoreHeap = nsmallest(beam_width, scoreHeap)
+
+    return best[1], came_from
+
+
+_worker_maps = {}
+
+
+def _expand_encoded(operator, encoded: tuple) -> list:
+    """
+    Runs in the worker process. The EquationMap of the operator is kept warm between
+    the calls.
+    """
+    equation_map = _worker_maps.get(operator, None)
+    if equation_map is None:
+        equation_map = EquationMap(*family(operator))
+        _worker_maps[operator] = equation_map
+    term = decode_postfix(encoded, equation_map.I, equation_map.O, equation_map.C)
+    return [encode_postfix(node.term) for node in equation_map.neighbor_nodes(term)]
+
+
+def _parallel_expansion(equation_map: EquationMap, executor: ProcessPoolExecutor):
+    if not equation_map.default_manipulations:
+        raise ValueError("parallel search supports only the default manipulations")
+    operator = equation_map.I.operator
+    I, O, C = equation_map.I, equation_map.O, equation_map.C
+
+    # the neighbors repeat a lot, so each encoding is decoded only once per search
+    decoded = {}
+
+    def get_decoded(encoded):
+        node = decoded.get(encoded, None)
+        if node is None:
+            node = equation_map.get_cached(decode_postfix(encoded, I, O, C))
+            decoded[encoded] = node
+        return node
+
+    def expand(nodes):
+        encoded = [encode_postfix(node.term) for node in nodes]
+        results = executor.map(_expand_encoded, [operator] * len(encoded), encoded)
+        return [[get_decoded(neighbor) for neighbor in neighbors] for neighbors in results]
+    return expand
+
+
+@contextmanager
+def _recording(equation_map: EquationMap, stats: SearchStats):
+    """
+    Lets the EquationMap report the manipulations to the stats during the search
+    """
+    if stats is None:
+        yield
+        return
+    stats.started(equation_map.cache_stats())
+    equation_map.stats = stats
+    try:
+        yield
+    finally:
+        equation_map.stats = None
+        stats.finished(equation_map.cache_stats())
+
+
+def _deadline_passed(stop_at: float) -> bool:
+    """
+    Tells if the search with the time.monotonic() time stop_at may have been stopped
+    before its end, so that its result should not be stored
+    """
+    return stop_at is not None and time.monotonic() >= stop_at
+
+
+def _reconstruct_path(came_from: dict, end: EquationMapItem, start: EquationMapItem) -> list:
+    path = [end.term]
+    prev = end
+    while str(prev) != str(start):
+        prev = came_from[prev]
+        path.insert(0, prev.term)
+    return path
+
+
+class _SearchFrontier:
+    """
+    One direction of the bidirectional search. The nodes are told apart by their
+    printout, as the equality of the terms is semantic.
+    """
+
+    def __init__(self, start: EquationMapItem, score, inverse: bool, beam_width: int = None):
+        self.start = start
+        self.inverse = inverse
+        self.score = score
+        self.beam_width = beam_width
+        self.heap = [(score(start), start)]
+        self.best = self.heap[0]
+        self.came_from = {}
+        self.seen = {str(start): start}
+
+    def expand(
+            self,
+            equation_map: EquationMap,
+            other,
+            stats: SearchStats = None,
+            on_improvement=None) -> str:
+        """
+        Expands the best node of this frontier and returns the printout of the first new
+        node the other frontier has already seen or None.
+        """
+        x = heappop(self.heap)
+        neighbornodes = [
+            (self.score(node_y), node_y)
+            for node_y in equation_map.neighbor_nodes(x[1], inverse=self.inverse) if node_y is not None
+            ]
+        neighbornodes.sort()
+        duplicates = 0
+        meeting = None
+        for item in neighbornodes:
+            y = item[1]
+            key = str(y)
+            if key in self.seen:
+                duplicates += 1
+                continue
+            self.came_from[y] = x[1]
+            self.seen[key] = y
+            if key in other.seen:
+                meeting = key
+                break
+            heappush(self.heap, item)
+            if item < self.best:
+                self.best = item
+                if on_improvement is not None:
+                    on_improvement(y.term, item[0])
+                if stats is not None:
+                    stats.improved(y.term, item[0])
+        if self.beam_width is not None and len(self.heap) > self.beam_width:
+            self.heap = nsmallest(self.beam_width, self.heap)
+        if stats is not None:
+            stats.expanded(len(neighbornodes), duplicates, len(self.heap))
+        return meeting
+
+
+def _bidirectional_route(
+        a: EquationMapItem,
+        b: EquationMapItem,
+        max_iterations: int,
+        equation_map: EquationMap,
+        stop_at: float = None,
+        on_improvement=None,
+        beam_width: int = None,
+        stats: SearchStats = None) -> tuple:
+    """
+    Searches from both ends until the frontiers meet. Returns the stitched path or None
+    if they did not meet, the forward frontier and the number of the iterations used.
+    The backward steps are taken with the manipulations and their inverses, so that every
+    step of the stitched path is a single rewrite in one direction or the other. The
+    on_improvement is called for the forward frontier and the beam_width limits both.
+    """
+    forward = _SearchFrontier(
+        a, lambda node: equation_map.dist_between(node, b), False, beam_width)
+    backward = _SearchFrontier(
+        b, lambda node: equation_map.dist_between(node, a), True, beam_width)
+
+    if str(a) == str(b):
+        return [a.term], forward, 0
+
+    iteration_count = 0
+    while iteration_count < max_iterations and (any(forward.heap) or any(backward.heap)):
+        if stop_at is not None and time.monotonic() >= stop_at:
+            break
+        iteration_count += 1
+        if any(forward.heap) and (len(forward.heap) <= len(backward.heap) or not any(backward.heap)):
+            meeting = forward.expand(equation_map, backward, stats, on_improvement)
+        else:
+            meeting = backward.expand(equation_map, forward, stats)
+        if meeting is not None:
+            forward_path = _reconstruct_path(forward.came_from, forward.seen[meeting], a)
+            backward_path = _reconstruct_path(backward.came_from, backward.seen[meeting], b)
+            backward_path.reverse()
+            return forward_path + backward_path[1:], forward, iteration_count
+    return None, forward, iteration_count
+
+
+def simplify(
+        term: IEquationTerm,
+        max_iterations = 1024,
+        equation_map=None,
+        deadline: float = None,
+        on_improvement=None,
+        beam_width: int = None,
+        workers: int = None,
+        stats: SearchStats = None):
     """
     >>> I, O, C = from_operator(debug)
     >>> a = C(1) + C(2)
@@ -642,50 +1170,80 @@ def simplify(term: IEquationTerm, max_iterations = 1024, equation_map=None):
     C(1, 2) * (I * C(3, 4) + I) * C(5)
     C(1, 2) * (C(3, 4) + I) * C(5)
 
+    With a deadline the search is stopped when the given amount of seconds has passed
+    and the best term found so far is returned. The on_improvement callback is called
+    with the term and its score whenever a better term is found. The beam_width limits
+    the size of the search frontier:
 
-    """
-    cached_term = equation_map.get_cached(term)
+    >>> improvements = []
+    >>> simplified, path = simplify(
+    ...     c, 300, m, deadline=60.0, beam_width=16,
+    ...     on_improvement=lambda term, score: improvements.append(score))
+    >>> simplified
+    C(1, 2) * (C(3, 4) + I) * C(5)
+    >>> improvements == sorted(improvements, reverse=True)
+    True
+    >>> simplify(c, 300, m, deadline=0.0)
+    (C(1, 2) * C(3, 4) * C(5) + C(1, 2) * C(5), [C(1, 2) * C(3, 4) * C(5) + C(1, 2) * C(5)])
 
-    closedset = set([])
-    firstItem = (equation_map.dist_between(cached_term, None), cached_term)
-    scoreHeap = [firstItem]
-    visitedheap = [firstItem]
-    
-    came_from = {}
+    With workers the popped nodes are expanded in a pool of processes. This needs a
+    picklable operator and the default manipulations of the EquationMap:
 
-    iteration_count = 0
-    while any(scoreHeap) and iteration_count < max_iterations: # is not empty
-        iteration_count += 1
-        x = heappop(scoreHeap)
-        closedset.add(x[1])
+    >>> simplified, path = simplify(b, 100, m, workers=2)
+    >>> simplified
+    C(1, 2) * C(3)
 
-        neighbornodes =  [ 
-            (equation_map.dist_between(node_y, None), node_y )
-            for node_y in equation_map.neighbor_nodes(x[1]) if node_y is not None
-            ]
-        #better sort here than update the heap
-        neighbornodes.sort()
+    The stats, a SearchStats, collects the counters and the timings of the search.
 
-        for score, y in neighbornodes:
-            
-            if y in closedset:
-                continue
-            
-            came_from[y] = x[1]
-            
-            heappush(scoreHeap, (score, y))
-            heappush(visitedheap, (score, y))
-    
-    shortest = heappop(visitedheap)[1]
-    path = [shortest.term]
-    prev = shortest
-    while str(prev) != str(term):
-        prev = came_from[prev]
-        path.insert(0, prev.term)
+    """
+    key = equation_map.result_key('simplify', term, max_iterations, beam_width)
+    stored = equation_map.load_result(key)
+    if stored is not None:
+        return stored
 
+    cached_term = equation_map.get_cached(term)
+    stop_at = None if deadline is None else time.monotonic() + deadline
+
+    with _recording(equation_map, stats):
+        if workers is None:
+            shortest, came_from = _best_first_search(
+                cached_term,
+                lambda node: equation_map.dist_between(node, None),
+                max_iterations,
+                equation_map,
+                stop_at=stop_at,
+                on_improvement=on_improvement,
+                beam_width=beam_width,
+                stats=stats)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shortest, came_from = _best_first_search(
+                    cached_term,
+                    lambda node: equation_map.dist_between(node, None),
+                    max_iterations,
+                    equation_map,
+                    stop_at=stop_at,
+                    on_improvement=on_improvement,
+                    beam_width=beam_width,
+                    executor=executor,
+                    batch_size=workers,
+                    stats=stats)
+
+    path = _reconstruct_path(came_from, shortest, cached_term)
+    if not _deadline_passed(stop_at):
+        equation_map.save_result(key, shortest.term, path)
     return shortest.term, path
 
-def get_route(a,b, max_iterations=1024, equation_map=None):
+def get_route(
+        a,
+        b,
+        max_iterations=1024,
+        equation_map=None,
+        deadline: float = None,
+        on_improvement=None,
+        beam_width: int = None,
+        bidirectional: bool = False,
+        stats: SearchStats = None):
     """
     >>> I, O, C = from_operator(debug)
     >>> m = EquationMap(I, O, C)
@@ -701,49 +1259,264 @@ def get_route(a,b, max_iterations=1024, equation_map=None):
     (C(1) + C(2)) * C(3)
     C(1, 2) * C(3)
 
+    The bidirectional search expands from both ends and stops when the frontiers meet.
+    The backward search uses also the inverse_manipulations of the EquationMap. If the
+    frontiers do not meet, the result is the same as with the forward search:
 
-    """
-    a = equation_map.get_cached(a)
-    b = equation_map.get_cached(b)
+    >>> shortest, path = get_route(a, b, 100, m, bidirectional=True)
+    >>> shortest
+    C(1, 2) * C(3)
+    >>> for p in path:
+    ...    print(p)
+    C(1) * C(3) + C(2) * C(3)
+    (C(1) + C(2)) * C(3)
+    C(1, 2) * C(3)
 
-    closedset = set([])
-    firstItem = (equation_map.dist_between(a, b), a)
-    scoreHeap = [firstItem]
-    visitedheap = [firstItem]
-    came_from = {}
+    >>> c = C(1,2) * C(3,4) * C(5) + C(1,2) * C(5)
+    >>> d = C(1, 2) * (C(3, 4) + I) * C(5)
+    >>> shortest, path = get_route(c, d, 100, m, bidirectional=True)
+    >>> for p in path:
+    ...    print(p)
+    C(1, 2) * C(3, 4) * C(5) + C(1, 2) * C(5)
+    C(1, 2) * C(3, 4) * I * C(5) + C(1, 2) * C(5)
+    (C(1, 2) * C(3, 4) * I + C(1, 2) * I) * I * C(5)
+    C(1, 2) * (C(3, 4) * I + I) * I * C(5)
+    C(1, 2) * (C(3, 4) + I) * I * C(5)
+    C(1, 2) * (C(3, 4) + I) * C(5)
 
-    iteration_count = 0
-    while any(scoreHeap) and iteration_count < max_iterations: # is not empty
-        iteration_count += 1
-        x = heappop(scoreHeap)
-        closedset.add(x[1])
+    The ends are told apart by their printouts, so an equal but differently written
+    target is searched for. The on_improvement and the beam_width work like in the
+    forward search:
 
-        neighbornodes =  [ 
-            (equation_map.dist_between(node_y, b), node_y )
-            for node_y in equation_map.neighbor_nodes(x[1]) if node_y is not None
-            ]
-        #better sort here than update the heap
-        neighbornodes.sort()
+    >>> e = C(1) * C(3) + C(2) * C(3) + C(5) * C(6)
+    >>> shortest, path = get_route(e, C(1, 2) * C(3) + C(5) * C(6), 200, m, bidirectional=True)
+    >>> shortest, len(path)
+    (C(1, 2) * C(3) + C(5) * C(6), 3)
 
-        for score, y in neighbornodes:
-            
-            if y in closedset:
-                continue
-            
-            came_from[y] = x[1]
-            
-            heappush(scoreHeap, (score, y))
-            heappush(visitedheap, (score, y))
-    
-    
-    shortest = heappop(visitedheap)[1]
-    path = [shortest.term]
-    prev = shortest
-    while str(prev) != str(a):
-        prev = came_from[prev]
-        path.insert(0, prev.term)
+    The max_iterations and the deadline bound the whole search, so the forward search
+    after the frontiers did not meet gets only what is left of them:
+
+    >>> stats = SearchStats()
+    >>> shortest, path = get_route(c, C(6), 30, m, bidirectional=True, stats=stats)
+    >>> stats.nodes_expanded
+    30
+
+    """
+    key = equation_map.result_key('get_route', a, b, max_iterations, beam_width, bidirectional)
+    stored = equation_map.load_result(key)
+    if stored is not None:
+        return stored
 
+    a = equation_map.get_cached(a)
+    b = equation_map.get_cached(b)
+    stop_at = None if deadline is None else time.monotonic() + deadline
+
+    with _recording(equation_map, stats):
+        shortest = None
+        if bidirectional:
+            path, forward, used = _bidirectional_route(
+                a, b, max_iterations, equation_map, stop_at=stop_at,
+                on_improvement=on_improvement, beam_width=beam_width, stats=stats)
+            if path is not None:
+                equation_map.save_result(key, path[-1], path)
+                return path[-1], path
+            # the forward search gets only what is left of the budget
+            max_iterations -= used
+            if max_iterations <= 0 or (stop_at is not None and time.monotonic() >= stop_at):
+                shortest, came_from = forward.best[1], forward.came_from
+
+        if shortest is None:
+            shortest, came_from = _best_first_search(
+                a,
+                lambda node: equation_map.dist_between(node, b),
+                max_iterations,
+                equation_map,
+                stop_at=stop_at,
+                on_improvement=on_improvement,
+                beam_width=beam_width,
+                stats=stats)
+
+    path = _reconstruct_path(came_from, shortest, a)
+    if not _deadline_passed(stop_at):
+        equation_map.save_result(key, shortest.term, path)
     return shortest.term, path
 
+def _simplify_encoded(operator, encoded: tuple, max_iterations: int, deadline: float, beam_width: int):
+    """
+    Runs in the worker process, which shares its EquationMap between the equations of
+    the same operator. Tells also if the deadline passed.
+    """
+    equation_map = _worker_maps.get(operator, None)
+    if equation_map is None:
+        equation_map = EquationMap(*family(operator))
+        _worker_maps[operator] = equation_map
+    term = decode_postfix(encoded, equation_map.I, equation_map.O, equation_map.C)
+    stop_at = None if deadline is None else time.monotonic() + deadline
+    simplified, path = simplify(
+        term, max_iterations, equation_map, deadline=deadline, beam_width=beam_width)
+    return (
+        encode_postfix(simplified),
+        [encode_postfix(step) for step in path],
+        _deadline_passed(stop_at))
+
+
+def simplify_many(
+        terms,
+        max_iterations = 1024,
+        equation_map=None,
+        workers: int = None,
+        deadline: float = None,
+        beam_width: int = None):
+    """
+    Simplifies many terms and yields (index, simplified, path) -tuples as the results
+    are ready. The identical terms are simplified only once. The equation_map can be
+    one EquationMap or a list of them, one for each operator, and the caches of a map
+    are shared between all the terms of the same operator. The terms can be any iterable,
+    such as a generator:
 
+    >>> I, O, C = from_operator(debug)
+    >>> m = EquationMap(I, O, C)
+    >>> terms = [C(1) + C(2), C(1) * C(3) + C(2) * C(3), C(1) + C(2)]
+    >>> for index, simplified, path in simplify_many(terms, 100, m):
+    ...    print(index, simplified, len(path))
+    0 C(1, 2) 2
+    2 C(1, 2) 2
+    1 C(1, 2) * C(3) 5
+
+    With workers the terms are simplified in a pool of processes and the results come
+    in the order they finish:
+
+    >>> results = sorted(simplify_many(terms, 100, m, workers=2), key=lambda result: result[0])
+    >>> for index, simplified, path in results:
+    ...    print(index, simplified, len(path))
+    0 C(1, 2) 2
+    1 C(1, 2) * C(3) 5
+    2 C(1, 2) 2
+
+    The operators without a given EquationMap get one created for them with the family
+    function. Their terms are rebuilt and simplified with the I, O and C of the created
+    map, like in the worker processes:
+
+    >>> generated = (C(i) + C(i + 1) for i in range(2))
+    >>> for index, simplified, path in simplify_many(generated, 100):
+    ...    print(index, simplified)
+    0 C(0, 1)
+    1 C(1, 2)
+
+    """
+    if equation_map is None:
+        equation_map = []
+    elif isinstance(equation_map, EquationMap):
+        equation_map = [equation_map]
+    maps = {m.I.operator: m for m in equation_map}
+    # the operators without a map get one of a family of their own
+    created = set()
+
+    def get_map(operator) -> EquationMap:
+        m = maps.get(operator, None)
+        if m is None:
+            m = EquationMap(*family(operator))
+            maps[operator] = m
+            created.add(operator)
+        return m
+
+    unique = {}
+    for index, term in enumerate(terms):
+        key = (term.operator, encode_postfix(term))
+        if key in unique:
+            unique[key][1].append(index)
+        else:
+            unique[key] = (term, [index])
+
+    if workers is None:
+        for (operator, encoded), (term, indexes) in unique.items():
+            m = get_map(operator)
+            if operator in created:
+                # the term is rebuilt with the I, O and C of the created map
+                term = decode_postfix(encoded, m.I, m.O, m.C)
+            simplified, path = simplify(
+                term, max_iterations, m, deadline=deadline, beam_width=beam_width)
+            for index in indexes:
+                yield index, simplified, path
+        return
+
+    for m in maps.values():
+        if not m.default_manipulations:
+            raise ValueError("parallel search supports only the default manipulations")
+
+    pending = {}
+    for (operator, encoded), (term, indexes) in unique.items():
+        m = get_map(operator)
+        key = m.result_key('simplify', term, max_iterations, beam_width)
+        stored = m.load_result(key)
+        if stored is not None:
+            for index in indexes:
+                yield (index,) + stored
+            continue
+        pending[(operator, encoded)] = (indexes, key)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _simplify_encoded, operator, encoded, max_iterations, deadline, beam_width): (operator, ) + item
+            for (operator, encoded), item in pending.items()}
+        for future in as_completed(futures):
+            operator, indexes, key = futures[future]
+            m = get_map(operator)
+            encoded, encoded_path, stopped = future.result()
+            simplified = decode_postfix(encoded, m.I, m.O, m.C)
+            path = [decode_postfix(step, m.I, m.O, m.C) for step in encoded_path]
+            if not stopped:
+                m.save_result(key, simplified, path)
+            for index in indexes:
+                yield index, simplified, path
+
+
+def simplify_components(
+        term: IEquationTerm,
+        max_iterations = 1024,
+        equation_map=None,
+        workers: int = None,
+        deadline: float = None,
+        beam_width: int = None):
+    """
+    Simplifies each group of the Get.components separately and returns the sum of the
+    simplified groups with the paths of the groups. The search cost is then the sum of
+    the costs of the parts instead of their product. With workers the groups are
+    simplified in parallel:
 
+    >>> I, O, C = from_operator(debug)
+    >>> m = EquationMap(I, O, C)
+    >>> a = C(1) * C(3) + C(5) * C(6) + C(2) * C(3) + C(5) * C(7)
+    >>> simplified, paths = simplify_components(a, 100, m)
+    >>> simplified
+    C(1, 2) * C(3) + C(5) * C(6, 7)
+    >>> simplified == a
+    True
+    >>> for path in paths:
+    ...    print(path[0], '=', path[-1])
+    C(1) * C(3) + C(2) * C(3) = C(1, 2) * C(3)
+    C(5) * C(6) + C(5) * C(7) = C(5) * C(6, 7)
+
+    """
+    parts = []
+    for component in Get.components(term):
+        part = component[0]
+        for summand in component[1:]:
+            part = part + summand
+        parts.append(part)
+
+    results = [None] * len(parts)
+    for index, simplified, path in simplify_many(
+            parts,
+            max_iterations,
+            equation_map,
+            workers=workers,
+            deadline=deadline,
+            beam_width=beam_width):
+        results[index] = (simplified, path)
+
+    simplified = results[0][0]
+    for part, _ in results[1:]:
+        simplified = simplified + part
+    return simplified, [path for _, path in results]
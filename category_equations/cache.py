@@ -0,0 +1,74 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache with hit, miss and eviction counters.
+    The size is unbounded when max_size is None.
+
+    >>> cache = LRUCache(max_size=2)
+    >>> cache.put('a', 1)
+    >>> cache.put('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.put('c', 3)
+    >>> cache.get('b') is None
+    True
+    >>> sorted(cache.keys())
+    ['a', 'c']
+    >>> cache.stats()
+    {'size': 2, 'max_size': 2, 'hits': 1, 'misses': 1, 'evictions': 1}
+
+    """
+
+    def __init__(self, max_size: int = None):
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size should be positive or None, got {}".format(max_size))
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def keys(self):
+        return self._items.keys()
+
+    def get(self, key, default=None):
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions}
@@ -6,9 +6,12 @@
 import abc
 from typing import Set, Callable
 
-from .operation import OperationsSet
+from .operation import OperationsSet, BitOperationsSet
+from .journal import EvaluationJournal
 
 class Category(metaclass=abc.ABCMeta):
+    __slots__ = ('_operator', '_sources', '_sinks', '_operations')
+
     def __init__(
             self,
             operator: Callable = None,
@@ -19,7 +22,7 @@ class Category(metaclass=abc.ABCMeta):
         if None in [operator, sources, sinks, operations]:
             raise ValueError("These should not be none: {}".format(
                 [operator, sources, sinks, operations]))
-        if not isinstance(operations, OperationsSet):
+        if not isinstance(operations, (OperationsSet, BitOperationsSet)):
             raise ValueError("expected OperationsSet, got {}".format(type(operations)))
         self._operator = operator
         self._sources = sources
@@ -42,6 +45,48 @@ class Category(metaclass=abc.ABCMeta):
     def operations(self) -> OperationsSet:
         return self._operations
 
+    def successors(self, node) -> Set:
+        """
+        The nodes, which the node is connected to by the operations of the term
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C(1, 2) * C(3, 4) * C(5)
+        >>> sorted(a.successors(1)), sorted(a.predecessors(5)), a.out_degree(5), a.in_degree(3)
+        ([3, 4], [3, 4], 0, 2)
+
+        """
+        return self.operations.successors(node)
+
+    def predecessors(self, node) -> Set:
+        """
+        The nodes, which are connected to the node by the operations of the term
+        """
+        return self.operations.predecessors(node)
+
+    def out_degree(self, node) -> int:
+        return self.operations.out_degree(node)
+
+    def in_degree(self, node) -> int:
+        return self.operations.in_degree(node)
+
+    def reachable_from(self, node) -> Set:
+        """
+        The nodes, which the node is connected to through one or more operations
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C(1) * C(2, 3) * C(4) + C(4) * C(5)
+        >>> sorted(a.reachable_from(2)), a.has_path(1, 5), a.has_path(5, 1)
+        ([4, 5], True, False)
+
+        """
+        return self.operations.reachable_from(node)
+
+    def has_path(self, source, sink) -> bool:
+        return self.operations.has_path(source, sink)
+
+    def transitive_closure(self) -> OperationsSet:
+        return self.operations.transitive_closure()
+
     def __hash__(self):
         return str(self).__hash__()
 
@@ -69,9 +114,42 @@ class Category(metaclass=abc.ABCMeta):
     def is_zero(self)  -> bool:
         raise NotImplementedError
 
-    def evaluate(self):
-        for frozen in self.operations.as_sorted_list:
-            frozen.evaluate()
+    def evaluate(self, operator: Callable = None, journal=None, profiler=None):
+        """
+        Connects the sources to the sinks with the operator of the term or with the given
+        operator, which is then used instead without rebuilding the term:
+
+        >>> I, O, C = from_operator(debug)
+        >>> connected = []
+        >>> (C(1, 2) * C(3)).evaluate(operator=lambda source, sink: connected.append((source, sink)))
+        >>> connected
+        [(1, 3), (2, 3)]
+
+        The journal, an EvaluationJournal or a path to one, records the evaluated
+        operations and they are skipped, when the evaluation is run again. The profiler,
+        an EvaluationProfiler, measures the operator calls.
+
+        """
+        if journal is not None and not isinstance(journal, EvaluationJournal):
+            with EvaluationJournal(journal) as opened:
+                return self.evaluate(operator=operator, journal=opened, profiler=profiler)
+        if profiler is not None:
+            profiler.start()
+        try:
+            for frozen in self.operations.as_sorted_list:
+                if journal is not None and journal.is_done(frozen, operator):
+                    continue
+                if profiler is not None:
+                    profiler.measure(frozen, operator)
+                elif operator is None:
+                    frozen.evaluate()
+                else:
+                    operator(frozen.source, frozen.sink)
+                if journal is not None:
+                    journal.record(frozen, operator)
+        finally:
+            if profiler is not None:
+                profiler.stop()
 
     @classmethod
     @abc.abstractmethod
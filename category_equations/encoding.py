@@ -0,0 +1,224 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import hashlib
+from typing import Callable
+
+from .processed_term import CategoryOperations
+from .term import IEquationTerm, Identity, Zero, Adder, CompactTerm
+from .nodes import NodeRange, NodeArray
+
+
+"""
+Picklable encoding of the terms, so that the terms can be moved between processes and
+rebuilt there with the I, O and C of the receiving side.
+"""
+
+
+def encode_term(term: IEquationTerm) -> tuple:
+    """
+    >>> I, O, C = from_operator(debug)
+    >>> encode_term(C(1) * I)
+    ('*', ('C', frozenset({('=', 1)})), ('I',))
+
+    """
+    return term.structural_key()
+
+
+def decode_term(encoded: tuple, I, O, C) -> IEquationTerm:
+    """
+    >>> I, O, C = from_operator(debug)
+    >>> a = (C(1) + O * C(2) + I) * C(3) - C(1) * C(3)
+    >>> b = decode_term(encode_term(a), I, O, C)
+    >>> b
+    ((C(1) + O * C(2)) + I) * C(3) - C(1) * C(3)
+    >>> a == b
+    True
+    >>> decode_term(encode_term(C.range(0, 5) + C.from_array([7, 9])), I, O, C)
+    C.range(0, 5) + C.from_array([7, 9])
+
+    >>> I, O, C = from_operator(debug, keep_history=False)
+    >>> a = (C(1) + I) * C(2)
+    >>> b = decode_term(encode_term(a), I, O, C)
+    >>> b
+    T(sinks=2, sources=1, operations=1)
+    >>> a == b
+    True
+
+    The deep terms are encoded and decoded without recursion:
+
+    >>> I, O, C = from_operator(debug)
+    >>> c = C(0)
+    >>> for i in range(1, 3000):
+    ...     c = c * C(i)
+    >>> d = decode_term(encode_term(c), I, O, C)
+    >>> str(d) == str(c), term_digest(d) == term_digest(c)
+    (True, True)
+
+    """
+    return decode_postfix(_postfix(encoded), I, O, C)
+
+
+_OPERATIONS = frozenset(operation.value for operation in CategoryOperations)
+
+
+def _postfix(encoded: tuple) -> tuple:
+    """
+    The encoding flattened to the encodings of the terminal terms and the operation
+    symbols in the postfix order. The nested encodings of the deep terms cannot be
+    compared, printed or pickled within the recursion limit, but the postfix can.
+    """
+    returned = []
+    stack = [encoded]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, str):
+            returned.append(current)
+        elif isinstance(current, tuple) and len(current) == 3 and current[0] in _OPERATIONS:
+            stack.extend((current[0], current[2], current[1]))
+        else:
+            returned.append(current)
+    return tuple(returned)
+
+
+def encode_postfix(term: IEquationTerm) -> tuple:
+    """
+    The encoding of the term in the postfix order, see decode_postfix
+    """
+    return _postfix(encode_term(term))
+
+
+def decode_postfix(postfix: tuple, I, O, C) -> IEquationTerm:
+    """
+    Rebuilds the term from the encode_postfix encoding with the I, O and C
+    """
+    stack = []
+    for item in postfix:
+        if not isinstance(item, str):
+            stack.append(_decode_terminal(item, I, O, C))
+            continue
+        source = stack.pop()
+        sink = stack.pop()
+        if item == CategoryOperations.ADD.value:
+            stack.append(sink + source)
+        elif item == CategoryOperations.DISCARD.value:
+            stack.append(sink - source)
+        else:
+            stack.append(sink * source)
+    return stack[0]
+
+
+def _decode_terminal(encoded: tuple, I, O, C) -> IEquationTerm:
+    kind = encoded[0]
+    if kind == 'I':
+        return I
+    if kind == 'O':
+        return O
+    if kind == 'C':
+        return C(*[_decode_item(item, I, O) for item in encoded[1]])
+    if kind == 'R':
+        return C.range(encoded[1], encoded[2])
+    if kind == 'A':
+        return C.from_array(encoded[1])
+    if kind == 'T':
+        # the empty nodes and operations of the O are of the right kind for the family
+        operations = O.operations.new_empty()
+        for source, sink in encoded[3]:
+            operations.add_freezed_operation(source, sink)
+        return CompactTerm(
+            operator=I.operator,
+            sinks=O.sinks.union(_decode_item(item, I, O) for item in encoded[1]),
+            sources=O.sources.union(_decode_item(item, I, O) for item in encoded[2]),
+            operations=operations)
+    raise ValueError("unknown term encoding {}".format(kind))
+
+
+def canonical_form(encoded):
+    """
+    Replaces the frozensets of the encoding with tuples sorted by their representation,
+    so that the result prints the same way in every process.
+
+    >>> I, O, C = from_operator(debug)
+    >>> canonical_form(encode_term(C(2, 1) * O))
+    ('*', ('C', (('=', 1), ('=', 2))), ('O',))
+
+    """
+    stack = []
+    for item in _postfix(encoded):
+        if not isinstance(item, str):
+            stack.append(_canonical_terminal(item))
+            continue
+        source = stack.pop()
+        sink = stack.pop()
+        stack.append((item, sink, source))
+    return stack[0]
+
+
+def _canonical_terminal(encoded):
+    if isinstance(encoded, frozenset):
+        return tuple(sorted((_canonical_terminal(item) for item in encoded), key=repr))
+    if isinstance(encoded, tuple):
+        return tuple(_canonical_terminal(item) for item in encoded)
+    return encoded
+
+
+def term_digest(*parts) -> str:
+    """
+    Structural hash of the given terms and plain values, which stays the same between
+    the processes and the runs as long as the nodes have a stable repr.
+
+    >>> I, O, C = from_operator(debug)
+    >>> term_digest(C(1, 2) * C(3)) == term_digest(C(2, 1) * C(3))
+    True
+    >>> term_digest(C(1, 2) * C(3)) == term_digest(C(1) * C(2, 3))
+    False
+    >>> term_digest(C(1)) == term_digest(C(1), 100)
+    False
+
+    """
+    described = []
+    for part in parts:
+        if isinstance(part, IEquationTerm):
+            operator = part.operator
+            described.append((
+                getattr(operator, '__module__', None),
+                getattr(operator, '__qualname__', repr(operator)),
+                tuple(
+                    item if isinstance(item, str) else _canonical_terminal(item)
+                    for item in encode_postfix(part))))
+        else:
+            described.append(part)
+    return hashlib.sha256(repr(tuple(described)).encode('utf-8')).hexdigest()
+
+
+def _decode_item(item: tuple, I, O):
+    if item[0] == 'I':
+        return I
+    if item[0] == 'O':
+        return O
+    return item[1]
+
+
+def family(operator: Callable, keep_history: bool = True, domain=None):
+    """
+    Creates the I, O and C for the operator without going through from_operator.
+    """
+    def _C(*things):
+        return Adder(
+            operator=operator, items=set(things), keep_history=keep_history, domain=domain)
+
+    def _range(start: int, stop: int):
+        return Adder(
+            operator=operator, items=NodeRange(start, stop), keep_history=keep_history,
+            domain=domain)
+
+    def _from_array(values):
+        return Adder(
+            operator=operator, items=NodeArray(values), keep_history=keep_history,
+            domain=domain)
+
+    _C.range = _range
+    _C.from_array = _from_array
+    return Identity(operator, keep_history, domain), Zero(operator, keep_history, domain), _C
@@ -0,0 +1,57 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+from typing import Callable, Iterable
+
+from .category import Category
+
+
+"""
+Evaluation of several terms at once.
+"""
+
+
+def evaluate_many(terms: Iterable[Category], operator: Callable = None, provenance: bool = True):
+    """
+    Evaluates the operations of the terms so that the operations shared by the terms
+    are evaluated only once. The terms are consumed one at a time, so they can be given
+    by a generator. Returns a dict from each evaluated FreezedOperation to the indexes of
+    the terms containing it, or None when provenance is not wanted:
+
+    >>> I, O, C = from_operator(debug)
+    >>> contributors = evaluate_many([C(1, 2) * C(3), C(2) * C(3, 4), C(1) * C(3)])
+    1 -> 3
+    2 -> 3
+    2 -> 4
+    >>> [(operation, contributors[operation]) for operation in sorted(contributors, key=repr)]
+    [(F(1,3), [0, 2]), (F(2,3), [0, 1]), (F(2,4), [1])]
+
+    With the operator given, the operations are compared by their nodes only:
+
+    >>> connected = []
+    >>> evaluate_many(
+    ...     [C(1) * C(2), C(1, 3) * C(2)],
+    ...     operator=lambda source, sink: connected.append((source, sink)),
+    ...     provenance=False)
+    >>> connected
+    [(1, 2), (3, 2)]
+
+    """
+    seen = set()
+    contributors = {} if provenance else None
+    for index, term in enumerate(terms):
+        for operation in term.operations.as_sorted_list:
+            key = operation if operator is None else (operation.source, operation.sink)
+            if key not in seen:
+                seen.add(key)
+                if operator is None:
+                    operation.evaluate()
+                else:
+                    operator(operation.source, operation.sink)
+            if provenance:
+                indexes = contributors.setdefault(operation, [])
+                if not indexes or indexes[-1] != index:
+                    indexes.append(index)
+    return contributors
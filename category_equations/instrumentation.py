@@ -0,0 +1,217 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import json
+import time
+from heapq import heappush, heapreplace
+from typing import Callable
+
+
+"""
+Counters for finding out, where the searches and the evaluations spend their time.
+"""
+
+
+class SearchStats:
+    """
+    Collects the statistics of a simplify or a get_route run given it as the stats. The
+    on_event callback, when given, is called with the event name and a dict of its data
+    for the 'expand', 'improvement' and 'finish' events:
+
+    >>> I, O, C = from_operator(debug)
+    >>> events = []
+    >>> stats = SearchStats(on_event=lambda name, data: events.append(name))
+    >>> simplified, path = simplify(C(1) + C(2), 20, EquationMap(I, O, C), stats=stats)
+    >>> simplified
+    C(1, 2)
+    >>> stats.nodes_expanded, events.count('expand'), events[-1]
+    (20, 20, 'finish')
+    >>> stats.neighbors_generated >= stats.duplicates_rejected > 0
+    True
+    >>> stats.best_scores[-1][1]
+    7
+    >>> sorted(stats.as_dict())[:4]
+    ['best_scores', 'cache_hits', 'duplicates_rejected', 'heap_sizes']
+
+    """
+
+    def __init__(self, on_event: Callable = None):
+        self.on_event = on_event
+        self.nodes_expanded = 0
+        self.neighbors_generated = 0
+        self.duplicates_rejected = 0
+        self.cache_hits = {'nodes': 0, 'rules': 0}
+        self.rule_calls = {}
+        self.rule_results = {}
+        self.rule_seconds = {}
+        self.heap_sizes = []
+        self.best_scores = []
+        self.seconds = 0.0
+        self._started = time.monotonic()
+        self._cache_start = None
+
+    def event(self, name: str, **data):
+        if self.on_event is not None:
+            self.on_event(name, data)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def expanded(self, neighbors: int, duplicates: int, heap_size: int):
+        self.nodes_expanded += 1
+        self.neighbors_generated += neighbors
+        self.duplicates_rejected += duplicates
+        self.heap_sizes.append(heap_size)
+        self.event(
+            'expand', iteration=self.nodes_expanded, neighbors=neighbors,
+            duplicates=duplicates, heap_size=heap_size)
+
+    def improved(self, term, score):
+        self.best_scores.append((self.elapsed(), score))
+        self.event('improvement', term=term, score=score, seconds=self.elapsed())
+
+    def rule_applied(self, rule_id: int, seconds: float, found: bool):
+        """
+        Called by the EquationMap for each manipulation, which was not in its cache
+        """
+        self.rule_calls[rule_id] = self.rule_calls.get(rule_id, 0) + 1
+        self.rule_seconds[rule_id] = self.rule_seconds.get(rule_id, 0.0) + seconds
+        if found:
+            self.rule_results[rule_id] = self.rule_results.get(rule_id, 0) + 1
+
+    def started(self, cache_stats: dict):
+        self._started = time.monotonic()
+        self._cache_start = cache_stats
+
+    def finished(self, cache_stats: dict):
+        self.seconds = self.elapsed()
+        for name in self.cache_hits:
+            self.cache_hits[name] += cache_stats[name]['hits'] - self._cache_start[name]['hits']
+        self.event('finish', seconds=self.seconds, nodes_expanded=self.nodes_expanded)
+
+    def as_dict(self) -> dict:
+        return {
+            'nodes_expanded': self.nodes_expanded,
+            'neighbors_generated': self.neighbors_generated,
+            'duplicates_rejected': self.duplicates_rejected,
+            'cache_hits': dict(self.cache_hits),
+            'rule_calls': dict(self.rule_calls),
+            'rule_results': dict(self.rule_results),
+            'rule_seconds': dict(self.rule_seconds),
+            'heap_sizes': list(self.heap_sizes),
+            'best_scores': list(self.best_scores),
+            'seconds': self.seconds}
+
+
+class EvaluationProfiler:
+    """
+    Measures the operator calls of the evaluations given it as the profiler. The latencies
+    are counted in a histogram of power of two microsecond buckets, keyed by the upper
+    bound of the bucket. The top slowest operations are kept and, with the group_by
+    function of the source and the sink, the calls and the time are summed per group. The
+    exporter, a callable or a path of a JSON file, gets the report after each evaluation:
+
+    >>> import json, os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'profile.json')
+    >>> I, O, C = from_operator(lambda source, sink: None)
+    >>> profiler = EvaluationProfiler(top=2, group_by=lambda source, sink: source, exporter=path)
+    >>> (C(1, 2) * C(3, 4, 5)).evaluate(profiler=profiler)
+    >>> report = profiler.report()
+    >>> report['calls'], sum(report['histogram'].values()), len(report['slowest'])
+    (6, 6, 2)
+    >>> report['groups']['1']['calls']
+    3
+    >>> with open(path) as stream:
+    ...     json.load(stream)['calls']
+    6
+
+    The report is exported also when the operator fails:
+
+    >>> def failing(source, sink):
+    ...     raise RuntimeError(source)
+    >>> reports = []
+    >>> (C(1) * C(2)).evaluate(operator=failing, profiler=EvaluationProfiler(exporter=reports.append))
+    Traceback (most recent call last):
+    ...
+    RuntimeError: 1
+    >>> len(reports)
+    1
+
+    """
+
+    def __init__(self, top: int = 10, group_by: Callable = None, exporter=None):
+        self.top = top
+        self.group_by = group_by
+        self.exporter = exporter
+        self.calls = 0
+        self.seconds = 0.0
+        self.wall_seconds = 0.0
+        self.histogram = {}
+        self.groups = {}
+        self._slowest = []
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is not None:
+            self.wall_seconds += time.perf_counter() - self._started
+            self._started = None
+        self.export()
+
+    def measure(self, operation, operator: Callable = None):
+        """
+        Evaluates the FreezedOperation, or calls the operator with its source and sink,
+        and records the latency
+        """
+        started = time.perf_counter()
+        if operator is None:
+            returned = operation.evaluate()
+        else:
+            returned = operator(operation.source, operation.sink)
+        self.record(operation.source, operation.sink, time.perf_counter() - started)
+        return returned
+
+    def record(self, source, sink, seconds: float):
+        self.calls += 1
+        self.seconds += seconds
+        bucket = 1 << int(seconds * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        if self.group_by is not None:
+            group = self.groups.setdefault(self.group_by(source, sink), [0, 0.0])
+            group[0] += 1
+            group[1] += seconds
+        if self.top > 0:
+            item = (seconds, self.calls, source, sink)
+            if len(self._slowest) < self.top:
+                heappush(self._slowest, item)
+            elif item[0] > self._slowest[0][0]:
+                heapreplace(self._slowest, item)
+
+    def report(self) -> dict:
+        seconds = self.wall_seconds or self.seconds
+        return {
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'calls_per_second': self.calls / seconds if seconds > 0 else None,
+            'histogram': {
+                bucket: self.histogram[bucket] for bucket in sorted(self.histogram)},
+            'slowest': [
+                {'source': repr(source), 'sink': repr(sink), 'seconds': seconds}
+                for seconds, _, source, sink in sorted(self._slowest, reverse=True)],
+            'groups': {
+                str(group): {'calls': calls, 'seconds': seconds}
+                for group, (calls, seconds) in self.groups.items()}}
+
+    def export(self):
+        if self.exporter is None:
+            return
+        report = self.report()
+        if callable(self.exporter):
+            self.exporter(report)
+            return
+        with open(self.exporter, 'w') as stream:
+            json.dump(report, stream, indent=2)
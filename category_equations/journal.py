@@ -0,0 +1,124 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import hashlib
+import os
+from typing import Callable
+
+
+"""
+Append-only journal of the evaluated operations, so that an interrupted evaluation can
+be continued where it stopped.
+"""
+
+
+class EvaluationJournal:
+    """
+    Records the digests of the evaluated operations as fixed size records. The digest is
+    of the module and the qualified name of the operator and the (source, sink) reprs, so
+    a journal shared between the operators does not skip the operations of one operator
+    after the other one has evaluated them. The lambdas of the same module share their
+    qualified name, so they should not share a journal. The records are written in batches of batch_size and synced to the disk
+    with os.fsync, when fsync is True. A partially written record at the end of the file
+    is dropped on open. The operations evaluated after the last written batch are
+    evaluated again after a crash, so the operator should tolerate that.
+
+    >>> import tempfile, os
+    >>> path = os.path.join(tempfile.mkdtemp(), 'journal')
+    >>> I, O, C = from_operator(debug)
+    >>> with EvaluationJournal(path, batch_size=2) as journal:
+    ...     (C(1) * C(2)).evaluate(journal=journal)
+    1 -> 2
+    >>> (C(1) * C(2, 3)).evaluate(journal=path)
+    1 -> 3
+    >>> with EvaluationJournal(path) as journal:
+    ...     len(journal)
+    2
+    >>> (C(1) * C(2, 3)).evaluate(journal=path, operator=print)
+    1 2
+    1 3
+
+    """
+
+    RECORD_SIZE = 16
+
+    def __init__(self, path: str, batch_size: int = 1024, fsync: bool = True):
+        if batch_size < 1:
+            raise ValueError("batch_size should be positive, got {}".format(batch_size))
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self._done = set()
+        self._pending = []
+        if os.path.exists(path):
+            with open(path, 'rb') as stream:
+                data = stream.read()
+            complete = len(data) - len(data) % self.RECORD_SIZE
+            for offset in range(0, complete, self.RECORD_SIZE):
+                self._done.add(data[offset:offset + self.RECORD_SIZE])
+            if complete != len(data):
+                with open(path, 'r+b') as stream:
+                    stream.truncate(complete)
+        self._stream = open(path, 'ab')
+
+    @classmethod
+    def digest(cls, operation, operator: Callable = None) -> bytes:
+        """
+        The record of the operation evaluated with the operator, by default with its own
+        """
+        if operator is None:
+            operator = operation.operator
+        described = (
+            getattr(operator, '__module__', None),
+            getattr(operator, '__qualname__', repr(operator)),
+            operation.source,
+            operation.sink)
+        return hashlib.blake2b(
+            repr(described).encode('utf-8'), digest_size=cls.RECORD_SIZE).digest()
+
+    def __len__(self):
+        return len(self._done)
+
+    def __contains__(self, operation):
+        return self.is_done(operation)
+
+    def is_done(self, operation, operator: Callable = None) -> bool:
+        """
+        Tells if the operation is evaluated with the operator, by default with its own
+        """
+        return self.digest(operation, operator) in self._done
+
+    def record(self, operation, operator: Callable = None):
+        """
+        Marks the operation evaluated with the operator, by default with its own
+        """
+        key = self.digest(operation, operator)
+        if key in self._done:
+            return
+        self._done.add(key)
+        self._pending.append(key)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._stream.write(b''.join(self._pending))
+        self._pending = []
+        self._stream.flush()
+        if self.fsync:
+            os.fsync(self._stream.fileno())
+
+    def close(self):
+        if self._stream.closed:
+            return
+        self.flush()
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,191 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import sys
+import tracemalloc
+from typing import Callable
+
+from .category import Category
+from .operation import OperationsSet, BitOperationsSet
+from .nodes import BitSet, NodeRange, NodeArray
+
+
+"""
+Accounts the memory used by the terms, so that the right compact modes can be chosen for
+the workload.
+"""
+
+
+CATEGORIES = ('edges', 'node_sets', 'nodes', 'history', 'indexes')
+
+
+class _Accounting:
+    """
+    Sums the sys.getsizeof of the objects per category. Each object is accounted only
+    once, by the category it is first seen in.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.bytes = dict.fromkeys(CATEGORIES, 0)
+        self.counts = {'terms': 0, 'operations': 0, 'node_sets': 0}
+
+    def add(self, category: str, obj) -> bool:
+        if id(obj) in self.seen:
+            return False
+        self.seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is not None and id(attributes) not in self.seen:
+            self.seen.add(id(attributes))
+            size += sys.getsizeof(attributes)
+        self.bytes[category] += size
+        return True
+
+    def add_deep(self, category: str, obj):
+        stack = [obj]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, Category) or not self.add(category, current):
+                continue
+            if isinstance(current, dict):
+                stack.extend(current.keys())
+                stack.extend(current.values())
+            elif isinstance(current, (list, tuple, set, frozenset)):
+                stack.extend(current)
+
+    def add_node(self, node):
+        # the I and the O are accounted as the terms
+        if not isinstance(node, Category):
+            self.add('nodes', node)
+
+    def add_node_set(self, nodes):
+        if not self.add('node_sets', nodes):
+            return
+        self.counts['node_sets'] += 1
+        if isinstance(nodes, BitSet):
+            self.add('node_sets', nodes.mask)
+            self.add('node_sets', nodes.extras)
+            for node in nodes.extras:
+                self.add_node(node)
+        elif isinstance(nodes, NodeRange):
+            self.add('node_sets', nodes._range)
+        elif isinstance(nodes, NodeArray):
+            self.add('node_sets', nodes._values)
+        else:
+            for node in nodes:
+                self.add_node(node)
+
+    def add_operations(self, operations: OperationsSet):
+        if not self.add('edges', operations):
+            return
+        if isinstance(operations, BitOperationsSet):
+            self.add('edges', operations.rows)
+            for source, mask in operations.rows.items():
+                self.add_node(source)
+                self.add('edges', mask)
+                self.counts['operations'] += bin(mask).count('1')
+            self.add_operations(operations._extra)
+        else:
+            for operation in set.__iter__(operations):
+                self.counts['operations'] += 1
+                self.add('edges', operation)
+                self.add_node(operation.source)
+                self.add_node(operation.sink)
+        for index in (operations._forward, operations._reverse, operations._reachability):
+            if index is not None:
+                self.add_deep('indexes', index)
+
+
+def memory_report(term: Category) -> dict:
+    """
+    Walks the term and its history and reports the bytes used by the operations (edges),
+    the sinks and the sources (node_sets), the node objects (nodes), the terms and their
+    ProcessedTerms (history) and the lazily built adjacency and reachability indexes
+    (indexes). Only the parts, which are already computed, are accounted and the shared
+    objects are accounted once:
+
+    >>> I, O, C = from_operator(debug)
+    >>> a = C(1, 2) * C(3, 4)
+    >>> b = a + a * C(5)
+    >>> report = memory_report(b)
+    >>> report['counts']
+    {'terms': 6, 'operations': 0, 'node_sets': 9}
+    >>> len(b.operations)
+    6
+
+    The operations of the subterms were computed too and each set has its own
+    FreezedOperations:
+
+    >>> report = memory_report(b)
+    >>> report['counts']['operations']
+    16
+    >>> report['total'] == sum(report['bytes'].values())
+    True
+    >>> memory_report(b)['bytes']['indexes']
+    0
+    >>> b.successors(1) == {3, 4}
+    True
+    >>> memory_report(b)['bytes']['indexes'] > 0
+    True
+
+    """
+    accounting = _Accounting()
+    stack = [term]
+    while stack:
+        current = stack.pop()
+        if not accounting.add('history', current):
+            continue
+        accounting.counts['terms'] += 1
+        for name in ('_sinks', '_sources', '_items'):
+            nodes = getattr(current, name, None)
+            if nodes is not None:
+                accounting.add_node_set(nodes)
+        operations = getattr(current, '_operations', None)
+        if operations is not None:
+            accounting.add_operations(operations)
+        processed_term = current.processed_term
+        if processed_term is not None and accounting.add('history', processed_term):
+            stack.extend((processed_term.sink, processed_term.source))
+    return {
+        'bytes': dict(accounting.bytes),
+        'total': sum(accounting.bytes.values()),
+        'counts': dict(accounting.counts)}
+
+
+def trace_construction(build: Callable, top: int = 10) -> tuple:
+    """
+    Calls the build with tracemalloc tracing and returns its result with the current and
+    the peak traced bytes of the construction and the top source lines allocating the
+    memory still in use:
+
+    >>> I, O, C = from_operator(debug)
+    >>> term, report = trace_construction(lambda: (C(1, 2) * C(3, 4)).operations, top=3)
+    >>> len(term), report['peak'] >= report['current'] > 0, len(report['top']) <= 3
+    (4, True, True)
+
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        if hasattr(tracemalloc, 'reset_peak'):
+            # the peak is not resettable before Python 3.9
+            tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        baseline, _ = tracemalloc.get_traced_memory()
+        returned = build()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    statistics = after.compare_to(before, 'lineno')
+    return returned, {
+        'current': current - baseline,
+        'peak': peak - baseline,
+        'top': [
+            {'location': str(statistic.traceback), 'bytes': statistic.size_diff}
+            for statistic in statistics[:top]]}
@@ -0,0 +1,361 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import abc
+import bisect
+import heapq
+import itertools
+import operator
+from array import array
+from collections.abc import Set as AbstractSet
+
+from .operation import BitOperationsSet, bit_positions, mask_of
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+"""
+Compact and immutable node collections for the huge sinks and sources. They do not
+contain I or O, so the term operations can use them as they are.
+"""
+
+
+def _as_index(x):
+    try:
+        return operator.index(x)
+    except TypeError:
+        return None
+
+
+class CompactNodes(AbstractSet, metaclass=abc.ABCMeta):
+
+    __hash__ = None
+
+    @abc.abstractmethod
+    def structural_key(self) -> tuple:
+        raise NotImplementedError
+
+    @property
+    def extras(self) -> frozenset:
+        """
+        The nodes which are not integers of the collection, like the I
+        """
+        return frozenset()
+
+    def __copy__(self):
+        return self
+
+    def union(self, *others):
+        """
+        >>> NodeRange(0, 3).union(NodeRange(3, 5))
+        NodeRange(0, 5)
+        >>> NodeRange(0, 3).union(NodeArray([10, 7]))
+        NodeArray([0, 1, 2, 7, 10])
+        >>> NodeRange(0, 3).union({'a'}) == {0, 1, 2, 'a'}
+        True
+
+        """
+        returned = self
+        for other in others:
+            returned = returned._union(other)
+        return returned
+
+    def _union(self, other):
+        if not other:
+            return self
+        if isinstance(other, BitSet):
+            return other.union(self)
+        if isinstance(other, CompactNodes):
+            return NodeArray.from_sorted(
+                value for value, _ in itertools.groupby(heapq.merge(self, other)))
+        returned = set(self)
+        returned.update(other)
+        return returned
+
+    def without(self, other):
+        """
+        The nodes, which are not in the other
+
+        >>> NodeRange(0, 5).without({0, 1})
+        NodeRange(2, 5)
+        >>> NodeRange(0, 5).without({'a'})
+        NodeRange(0, 5)
+        >>> NodeRange(0, 5).without({2})
+        NodeArray([0, 1, 3, 4])
+
+        """
+        removed = [x for x in other if x in self]
+        if not removed:
+            return self
+        removed = set(removed)
+        return NodeArray.from_sorted(value for value in self if value not in removed)
+
+
+class NodeRange(CompactNodes):
+    """
+    The integers of range(start, stop)
+
+    >>> nodes = NodeRange(0, 10 ** 6)
+    >>> len(nodes), 10 in nodes, 10 ** 6 in nodes, 'a' in nodes
+    (1000000, True, False, False)
+    >>> nodes == set(range(10 ** 6))
+    True
+    >>> NodeRange(0, 3) == {0, 1, 2}
+    True
+
+    """
+
+    def __init__(self, start: int, stop: int):
+        self._range = range(start, max(start, stop))
+
+    @property
+    def start(self) -> int:
+        return self._range.start
+
+    @property
+    def stop(self) -> int:
+        return self._range.stop
+
+    def __contains__(self, x):
+        index = _as_index(x)
+        return index is not None and index in self._range
+
+    def __iter__(self):
+        return iter(self._range)
+
+    def __len__(self):
+        return len(self._range)
+
+    def __eq__(self, other):
+        if isinstance(other, NodeRange):
+            return self._range == other._range
+        return super().__eq__(other)
+
+    def _union(self, other):
+        if isinstance(other, NodeRange) and \
+                other.start <= self.stop and self.start <= other.stop:
+            return NodeRange(min(self.start, other.start), max(self.stop, other.stop))
+        return super()._union(other)
+
+    def without(self, other):
+        removed = [x for x in other if x in self]
+        if not removed:
+            return self
+        start, stop = self.start, self.stop
+        removed = set(_as_index(x) for x in removed)
+        while start in removed:
+            start += 1
+        while stop - 1 in removed and stop > start:
+            stop -= 1
+        if all(x < start or x >= stop for x in removed):
+            return NodeRange(start, stop)
+        return super().without(removed)
+
+    def structural_key(self) -> tuple:
+        return ('R', self.start, self.stop)
+
+    def __str__(self):
+        return 'range({}, {})'.format(self.start, self.stop)
+
+    def __repr__(self):
+        return 'NodeRange({}, {})'.format(self.start, self.stop)
+
+
+class NodeArray(CompactNodes):
+    """
+    Sorted unique integers in an array. A numpy array is kept as a numpy array, other
+    iterables are packed to a 64 bit integer array:
+
+    >>> nodes = NodeArray([5, 1, 3, 1])
+    >>> nodes
+    NodeArray([1, 3, 5])
+    >>> 3 in nodes, 4 in nodes, 'a' in nodes
+    (True, False, False)
+    >>> print(NodeArray(range(100)))
+    from_array([0, 1, 2, ..., 97, 98, 99])
+
+    """
+
+    def __init__(self, values):
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            self._values = numpy.unique(values)
+        else:
+            self._values = array('q', sorted(set(values)))
+
+    @staticmethod
+    def from_sorted(values) -> 'NodeArray':
+        returned = NodeArray.__new__(NodeArray)
+        returned._values = array('q', values)
+        return returned
+
+    def __contains__(self, x):
+        index = _as_index(x)
+        if index is None:
+            return False
+        if numpy is not None and isinstance(self._values, numpy.ndarray):
+            position = int(numpy.searchsorted(self._values, index))
+        else:
+            position = bisect.bisect_left(self._values, index)
+        return position < len(self._values) and self._values[position] == index
+
+    def __iter__(self):
+        if numpy is not None and isinstance(self._values, numpy.ndarray):
+            return iter(self._values.tolist())
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, NodeArray):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return super().__eq__(other)
+
+    def structural_key(self) -> tuple:
+        return ('A', tuple(self))
+
+    def _abbreviated(self) -> str:
+        values = list(self) if len(self) <= 6 else \
+            [int(x) for x in self._values[:3]] + ['...'] + [int(x) for x in self._values[-3:]]
+        return '[{}]'.format(', '.join(map(str, values)))
+
+    def __str__(self):
+        return 'from_array({})'.format(self._abbreviated())
+
+    def __repr__(self):
+        return 'NodeArray({})'.format(self._abbreviated())
+
+
+class BitSet(CompactNodes):
+    """
+    The integers 0 ... size - 1 as the bits of a Python integer. The other nodes, like the
+    I, are kept aside in the extras.
+
+    >>> nodes = BitSet.from_nodes(8, [1, 3, 'a'])
+    >>> nodes
+    {1, 3, 'a'}
+    >>> 3 in nodes, 2 in nodes, 'a' in nodes, 9 in nodes
+    (True, False, True, False)
+    >>> nodes.union({2, 9}) == {1, 2, 3, 9, 'a'}
+    True
+    >>> nodes.union({2, 9}).mask == 0b1110
+    True
+    >>> nodes.without({1, 'a'})
+    {3}
+    >>> nodes == {1, 3, 'a'}
+    True
+    >>> BitSet.from_nodes(8, [])
+    set()
+
+    """
+
+    def __init__(self, size: int, mask: int = 0, extras: frozenset = frozenset()):
+        self.size = size
+        self.mask = mask
+        self._extras = extras
+
+    @staticmethod
+    def from_nodes(size: int, nodes) -> 'BitSet':
+        if isinstance(nodes, BitSet) and nodes.size == size:
+            return nodes
+        positions = []
+        extras = []
+        for node in nodes:
+            index = _as_index(node)
+            if index is not None and 0 <= index < size and index == node:
+                positions.append(index)
+            else:
+                extras.append(node)
+        return BitSet(size, mask_of(positions, size), frozenset(extras))
+
+    @property
+    def extras(self) -> frozenset:
+        return self._extras
+
+    def __contains__(self, x):
+        index = _as_index(x)
+        if index is not None and 0 <= index < self.size and index == x:
+            return bool(self.mask >> index & 1)
+        return x in self._extras
+
+    def __iter__(self):
+        yield from bit_positions(self.mask)
+        yield from self._extras
+
+    def __len__(self):
+        return bin(self.mask).count('1') + len(self._extras)
+
+    def __eq__(self, other):
+        if isinstance(other, BitSet) and other.size == self.size:
+            return self.mask == other.mask and self._extras == other._extras
+        return super().__eq__(other)
+
+    def _union(self, other):
+        other = BitSet.from_nodes(self.size, other)
+        return BitSet(self.size, self.mask | other.mask, self._extras | other._extras)
+
+    def without(self, other):
+        other = BitSet.from_nodes(self.size, other)
+        return BitSet(self.size, self.mask & ~other.mask, self._extras - other._extras)
+
+    def structural_key(self) -> tuple:
+        return ('B', self.size, self.mask, frozenset(self._extras))
+
+    def __repr__(self):
+        if not self:
+            return 'set()'
+        return '{{{}}}'.format(', '.join(map(repr, self)))
+
+
+class IntDomain:
+    """
+    Opt-in representation for the families, whose nodes are mostly the integers
+    0 ... size - 1. The sinks and sources become BitSets and the operations become a bit
+    matrix, while the terms work as before:
+
+    >>> I, O, C = from_operator(debug, domain=IntDomain(16))
+    >>> a = C(1, 2) * (C(3, 4) + I) * C(5)
+    >>> a.sinks
+    {1, 2}
+    >>> a.operations.rows == {1: 0b111000, 2: 0b111000, 3: 0b100000, 4: 0b100000}
+    True
+    >>> a.evaluate()
+    1 -> 3
+    1 -> 4
+    1 -> 5
+    2 -> 3
+    2 -> 4
+    2 -> 5
+    3 -> 5
+    4 -> 5
+    >>> a == C(1,2) * C(3,4) * C(5) + C(1,2) * C(5)
+    True
+    >>> C(1) * C(2, I) == C(1) + C(1) * C(2)
+    True
+
+    """
+
+    def __init__(self, size: int):
+        if size < 0:
+            raise ValueError("size should not be negative, got {}".format(size))
+        self.size = size
+
+    def nodes(self, nodes=()) -> BitSet:
+        return BitSet.from_nodes(self.size, nodes)
+
+    def operations(self, operator) -> BitOperationsSet:
+        return BitOperationsSet([], operator=operator, size=self.size)
+
+    def __eq__(self, other):
+        return isinstance(other, IntDomain) and self.size == other.size
+
+    def __hash__(self):
+        return hash((IntDomain, self.size))
+
+    def __repr__(self):
+        return 'IntDomain({})'.format(self.size)
@@ -3,6 +3,7 @@
    @license: MIT <https://opensource.org/license/mit>
 """
 
+from collections.abc import MutableSet, Set as AbstractSet
 from typing import Callable
 
 
@@ -13,6 +14,22 @@ manipulated before applying em.
 
 
 class FreezedOperation:
+    """
+    The operations are the most numerous objects, so their attributes are kept in slots
+    instead of a per instance dict. They can be pickled, when their operator and nodes
+    can:
+
+    >>> import pickle
+    >>> a = FreezedOperation(debug, 1, 2)
+    >>> a.operator is debug, a.source, a.sink
+    (True, 1, 2)
+    >>> pickle.loads(pickle.dumps(a)) == a
+    True
+
+    """
+
+    __slots__ = ('_operator', '_source', '_sink')
+
     def __init__(self, operator, source, sink):
         self._operator = operator
         self._source = source
@@ -42,32 +59,43 @@ class FreezedOperation:
 
 
     def __repr__(self):
-        return 'F(%s,%s)'% (self.source, self.sink)
+        return 'F(%s,%s)'% (self._source, self._sink)
 
     def evaluate(self):
         """
         Connect source to sink via operator
         """
-        return self.operator(self.source, self.sink)
+        return self._operator(self._source, self._sink)
 
     def __eq__(self, other):
         return isinstance(other, FreezedOperation) and \
-            (self.operator, self.source, self.sink) == (other.operator, other.source, other.sink)
+            (self._operator, self._source, self._sink) == (other._operator, other._source, other._sink)
 
     def __hash__(self):
-        return (self.operator, self.source, self.sink).__hash__()
+        return (self._operator, self._source, self._sink).__hash__()
+
+    def __reduce__(self):
+        return (FreezedOperation, (self._operator, self._source, self._sink))
 
     @staticmethod
     def sort_key(f_f):
         return (f_f.operator, f_f.source, f_f.sink)
 
-class OperationsSet(set):
-    def __init__(self, operations, operator=None):
+
+class _OperationsQueries:
+    """
+    The neighbor and reachability queries of the operations, shared by the OperationsSet
+    and the BitOperationsSet. The indexes are kept in the _forward, _reverse and
+    _reachability attributes, which the mutating methods drop with _invalidate.
+    """
+
+    def _init_operator(self, operator):
         if not isinstance(operator, Callable):
             raise ValueError("given operator {} is not Callable".format(operator))
         self.operator = operator
-        self.check_operations(operations)
-        super().__init__(operations)
+        self._forward = None
+        self._reverse = None
+        self._reachability = None
 
     def check_operations(self, operations):
         for operation in operations:
@@ -76,23 +104,604 @@ class OperationsSet(set):
             if operation.operator != self.operator:
                 raise ValueError("incompatible operator in given operation")
 
+    def _invalidate(self):
+        self._forward = None
+        self._reverse = None
+        self._reachability = None
+
+    @staticmethod
+    def _index(pairs) -> dict:
+        index = {}
+        for key, value in pairs:
+            index.setdefault(key, set()).add(value)
+        return {key: frozenset(values) for key, values in index.items()}
+
+    def successors(self, node) -> frozenset:
+        """
+        The sinks, to which the node is connected as a source
+        """
+        if self._forward is None:
+            self._forward = self._index((f.source, f.sink) for f in self)
+        return self._forward.get(node, frozenset())
+
+    def predecessors(self, node) -> frozenset:
+        """
+        The sources, which are connected to the node as a sink
+        """
+        if self._reverse is None:
+            self._reverse = self._index((f.sink, f.source) for f in self)
+        return self._reverse.get(node, frozenset())
+
+    def out_degree(self, node) -> int:
+        return len(self.successors(node))
+
+    def in_degree(self, node) -> int:
+        return len(self.predecessors(node))
+
+    def _search(self, node, target=None):
+        """
+        Breadth first search over the successors, which stops early at the target
+        """
+        seen = set()
+        frontier = [node]
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for sink in self.successors(current):
+                    if sink in seen:
+                        continue
+                    if target is not None and sink == target:
+                        return True
+                    seen.add(sink)
+                    next_frontier.append(sink)
+            frontier = next_frontier
+        return seen if target is None else False
+
+    def _reachable_masks(self) -> tuple:
+        """
+        The nodes, their positions and the bit masks of the nodes reachable from each
+        node. The strongly connected components are found with Tarjan's algorithm, which
+        returns them sinks first, so each component needs only one pass over its edges.
+        """
+        if self._reachability is not None:
+            return self._reachability
+        positions = {}
+        nodes = []
+        edges = []
+        for operation in self:
+            for node in (operation.source, operation.sink):
+                if node not in positions:
+                    positions[node] = len(nodes)
+                    nodes.append(node)
+                    edges.append([])
+            edges[positions[operation.source]].append(positions[operation.sink])
+
+        count = len(nodes)
+        index = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        component_of = [-1] * count
+        stack = []
+        components = []
+        counter = 0
+        for root in range(count):
+            if index[root] >= 0:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                elif child <= len(edges[node]):
+                    low[node] = min(low[node], low[edges[node][child - 1]])
+                while child < len(edges[node]):
+                    sink = edges[node][child]
+                    if index[sink] < 0:
+                        break
+                    if on_stack[sink]:
+                        low[node] = min(low[node], index[sink])
+                    child += 1
+                if child < len(edges[node]):
+                    work.append((node, child + 1))
+                    work.append((edges[node][child], 0))
+                    continue
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component_of[member] = len(components)
+                        members.append(member)
+                        if member == node:
+                            break
+                    components.append(members)
+
+        component_masks = []
+        for number, members in enumerate(components):
+            mask = 0
+            for member in members:
+                for sink in edges[member]:
+                    target = component_of[sink]
+                    if target == number:
+                        mask |= 1 << sink
+                    else:
+                        mask |= component_masks[target] | 1 << sink
+            component_masks.append(mask)
+        masks = [component_masks[component_of[node]] for node in range(count)]
+        self._reachability = (nodes, positions, masks)
+        return self._reachability
+
+    def reachable_from(self, node) -> frozenset:
+        """
+        The nodes, which can be reached from the node through one or more operations.
+        The cached transitive closure is used, when it has been built.
+
+        >>> a = OperationsSet([FreezedOperation(debug, 1, 2), FreezedOperation(debug, 2, 3),
+        ...     FreezedOperation(debug, 3, 2), FreezedOperation(debug, 4, 1)], operator=debug)
+        >>> sorted(a.reachable_from(1)), sorted(a.reachable_from(2)), a.has_path(3, 1)
+        ([2, 3], [2, 3], False)
+        >>> a.transitive_closure().as_sorted_list
+        [F(1,2), F(1,3), F(2,2), F(2,3), F(3,2), F(3,3), F(4,1), F(4,2), F(4,3)]
+        >>> sorted(a.reachable_from(4)), a.has_path(4, 3), a.has_path(3, 3)
+        ([1, 2, 3], True, True)
+
+        """
+        if self._reachability is None:
+            return frozenset(self._search(node))
+        nodes, positions, masks = self._reachability
+        if node not in positions:
+            return frozenset()
+        return frozenset(nodes[position] for position in bit_positions(masks[positions[node]]))
+
+    def has_path(self, source, sink) -> bool:
+        """
+        Tells if the sink can be reached from the source through one or more operations
+        """
+        if self._reachability is None:
+            return self._search(source, sink)
+        _, positions, masks = self._reachability
+        if source not in positions or sink not in positions:
+            return False
+        return bool(masks[positions[source]] >> positions[sink] & 1)
+
+    def transitive_closure(self):
+        """
+        The operations from each node to every node reachable from it. The reachability
+        is cached for the following reachable_from and has_path calls.
+        """
+        nodes, _, masks = self._reachable_masks()
+        returned = self.new_empty()
+        for source, mask in zip(nodes, masks):
+            for position in bit_positions(mask):
+                returned.add_freezed_operation(source, nodes[position])
+        return returned
+
+    @property
+    def as_sorted_list(self):
+        """
+        Converts the set to a sorted list
+        """
+        return sorted(self, key=FreezedOperation.sort_key)
+
+
+class OperationsSet(_OperationsQueries, set):
+    """
+    The forward and reverse adjacency indexes are built on the first neighbor query and
+    dropped by the mutating methods. The terms share their operations sets, so they
+    share the indexes too:
+
+    >>> a = OperationsSet([FreezedOperation(debug, 1, 2), FreezedOperation(debug, 1, 3)], operator=debug)
+    >>> sorted(a.successors(1)), a.predecessors(3), a.out_degree(1), a.in_degree(1)
+    ([2, 3], frozenset({1}), 2, 0)
+    >>> a.add_freezed_operation(4, 3)
+    >>> sorted(a.predecessors(3))
+    [1, 4]
+
+    """
+
+    def __init__(self, operations, operator=None):
+        self._init_operator(operator)
+        operations = list(operations)
+        self.check_operations(operations)
+        super().__init__(operations)
+
+
     def union(self, another):
+        if isinstance(another, BitOperationsSet):
+            return another.union(self)
         self.check_operations(another)
         return OperationsSet(super().union(another), operator=self.operator)
 
     def discard_all(self, another):
         self.check_operations(another)
         c = OperationsSet(self, operator=self.operator)
-        for operation in another:
-            c.discard(operation)
+        set.difference_update(c, another)
         return c
 
     def add_freezed_operation(self, a, b):
         self.add(FreezedOperation(self.operator, a, b))
 
-    @property
-    def as_sorted_list(self):
+    def add(self, operation):
+        self._invalidate()
+        super().add(operation)
+
+    def discard(self, operation):
+        self._invalidate()
+        super().discard(operation)
+
+    def remove(self, operation):
+        self._invalidate()
+        super().remove(operation)
+
+    def pop(self):
+        self._invalidate()
+        return super().pop()
+
+    def clear(self):
+        self._invalidate()
+        super().clear()
+
+    def update(self, *others):
+        self._invalidate()
+        super().update(*others)
+
+    def difference_update(self, *others):
+        self._invalidate()
+        super().difference_update(*others)
+
+    def intersection_update(self, *others):
+        self._invalidate()
+        super().intersection_update(*others)
+
+    def symmetric_difference_update(self, other):
+        self._invalidate()
+        super().symmetric_difference_update(other)
+
+    def __ior__(self, other):
+        self._invalidate()
+        return super().__ior__(other)
+
+    def __isub__(self, other):
+        self._invalidate()
+        return super().__isub__(other)
+
+    def __iand__(self, other):
+        self._invalidate()
+        return super().__iand__(other)
+
+    def __ixor__(self, other):
+        self._invalidate()
+        return super().__ixor__(other)
+
+    def connect(self, sources, sinks):
         """
-        Converts the set to a sorted list
+        Adds the operations from all the sources to all the sinks
+        """
+        self._invalidate()
+        add = super().add
+        for source in sources:
+            for sink in sinks:
+                add(FreezedOperation(self.operator, source, sink))
+
+    def new_empty(self):
+        """
+        Empty operations set of the same kind
+        """
+        return OperationsSet([], operator=self.operator)
+
+    def __reduce__(self):
+        # the indexes are left out and rebuilt on demand
+        return (OperationsSet, (list(self), self.operator))
+
+    def with_operator(self, operator: Callable) -> 'OperationsSet':
+        """
+        The same operations with the other operator
+        """
+        if operator == self.operator:
+            return self
+        return OperationsSet(
+            [FreezedOperation(operator, f.source, f.sink) for f in self], operator=operator)
+
+
+
+def bit_positions(mask: int):
+    """
+    The positions of the set bits in increasing order
+    """
+    reversed_bits = bin(mask)[:1:-1]
+    position = reversed_bits.find('1')
+    while position >= 0:
+        yield position
+        position = reversed_bits.find('1', position + 1)
+
+
+def mask_of(positions, size: int) -> int:
+    """
+    The integer with the bits of the positions set
+    """
+    packed = bytearray((size + 7) // 8)
+    for position in positions:
+        packed[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bytes(packed), 'little')
+
+
+class BitOperationsSet(_OperationsQueries, MutableSet):
+    """
+    The operations between the integers 0 ... size - 1 as a bit matrix, where rows maps
+    the source to the bit mask of its sinks. The other operations are kept in a normal
+    OperationsSet. It is not a subclass of the set, as it has no storage of the set, but
+    it has the same methods:
+
+    >>> a = BitOperationsSet([], operator=debug, size=8)
+    >>> a.add_freezed_operation(1, 2)
+    >>> a.add_freezed_operation(1, 'x')
+    >>> a
+    BitOperationsSet({F(1,2), F(1,x)})
+    >>> FreezedOperation(debug, 1, 2) in a, len(a)
+    (True, 2)
+    >>> b = OperationsSet([FreezedOperation(debug, 1, 2), FreezedOperation(debug, 3, 4)], operator=debug)
+    >>> c = a.union(b)
+    >>> c
+    BitOperationsSet({F(1,2), F(3,4), F(1,x)})
+    >>> b.union(a) == a.union(b)
+    True
+    >>> a.discard_all(b)
+    BitOperationsSet({F(1,x)})
+    >>> b.discard_all(a)
+    OperationsSet({F(3,4)})
+    >>> set(c) == set(b) | {FreezedOperation(debug, 1, 'x')}
+    True
+    >>> c & b
+    BitOperationsSet({F(1,2), F(3,4)})
+    >>> b <= c, c.issubset(b), c.issuperset(b), c.isdisjoint(b)
+    (True, False, True, False)
+    >>> d = OperationsSet([], operator=debug)
+    >>> d.update(a)
+    >>> d == a
+    True
+
+    """
+
+    def __init__(self, operations=(), operator=None, size: int = 0):
+        self._init_operator(operator)
+        self.size = size
+        self.rows = {}
+        self._extra = OperationsSet([], operator=operator)
+        self.update(operations)
+
+    def _in_domain(self, node) -> bool:
+        return type(node) is int and 0 <= node < self.size
+
+    def new_empty(self):
+        return BitOperationsSet([], operator=self.operator, size=self.size)
+
+    def with_operator(self, operator: Callable) -> 'BitOperationsSet':
+        """
+        The rows do not contain the operator, so only they are copied
+        """
+        if operator == self.operator:
+            return self
+        returned = BitOperationsSet([], operator=operator, size=self.size)
+        returned.rows = dict(self.rows)
+        returned._extra = self._extra.with_operator(operator)
+        return returned
+
+    def copy(self):
+        returned = self.new_empty()
+        returned.rows = dict(self.rows)
+        returned._extra = OperationsSet(self._extra, operator=self.operator)
+        return returned
+
+    def _from_iterable(self, operations):
+        # the results of the operators of the collections.abc.Set
+        return BitOperationsSet(operations, operator=self.operator, size=self.size)
+
+    def add_freezed_operation(self, a, b):
+        self._invalidate()
+        if self._in_domain(a) and self._in_domain(b):
+            self.rows[a] = self.rows.get(a, 0) | 1 << b
+        else:
+            self._extra.add_freezed_operation(a, b)
+
+    def add(self, operation):
+        self.check_operations([operation])
+        self.add_freezed_operation(operation.source, operation.sink)
+
+    def update(self, *others):
+        self._invalidate()
+        for other in others:
+            if isinstance(other, BitOperationsSet) and other.size == self.size:
+                self.check_operations(other._extra)
+                if other.operator != self.operator:
+                    raise ValueError("incompatible operator in given operation")
+                for source, mask in other.rows.items():
+                    self.rows[source] = self.rows.get(source, 0) | mask
+                self._extra.update(other._extra)
+            else:
+                for operation in other:
+                    self.add(operation)
+
+    def discard(self, operation):
+        if not isinstance(operation, FreezedOperation) or operation.operator != self.operator:
+            return
+        self._invalidate()
+        source, sink = operation.source, operation.sink
+        if self._in_domain(source) and self._in_domain(sink):
+            row = self.rows.get(source, 0) & ~(1 << sink)
+            if row:
+                self.rows[source] = row
+            else:
+                self.rows.pop(source, None)
+        else:
+            self._extra.discard(operation)
+
+    def remove(self, operation):
+        if operation not in self:
+            raise KeyError(operation)
+        self.discard(operation)
+
+    def clear(self):
+        self._invalidate()
+        self.rows.clear()
+        self._extra.clear()
+
+    def connect(self, sources, sinks):
         """
-        return sorted(self, key=FreezedOperation.sort_key)
\ No newline at end of file
+        The bit masks are used directly, when the sources and sinks are BitSets of the
+        same size
+        """
+        self._invalidate()
+        if getattr(sources, 'size', None) != self.size or getattr(sinks, 'size', None) != self.size:
+            for source in sources:
+                for sink in sinks:
+                    self.add_freezed_operation(source, sink)
+            return
+        if sinks.mask:
+            for source in bit_positions(sources.mask):
+                self.rows[source] = self.rows.get(source, 0) | sinks.mask
+        for source in sources.extras:
+            for sink in sinks:
+                self._extra.add_freezed_operation(source, sink)
+        for source in bit_positions(sources.mask):
+            for sink in sinks.extras:
+                self._extra.add_freezed_operation(source, sink)
+
+    def union(self, another):
+        returned = self.copy()
+        returned.update(another)
+        return returned
+
+    def successors(self, node) -> frozenset:
+        """
+        The row of the node is used directly, only the reverse index is built:
+
+        >>> a = BitOperationsSet([], operator=debug, size=8)
+        >>> a.add_freezed_operation(1, 2)
+        >>> a.add_freezed_operation(1, 3)
+        >>> sorted(a.successors(1)), a.predecessors(3), a.out_degree(1)
+        ([2, 3], frozenset({1}), 2)
+
+        """
+        if not self._in_domain(node):
+            return self._extra.successors(node)
+        returned = frozenset(bit_positions(self.rows.get(node, 0)))
+        extra = self._extra.successors(node)
+        return returned.union(extra) if extra else returned
+
+    def predecessors(self, node) -> frozenset:
+        if not self._in_domain(node):
+            return self._extra.predecessors(node)
+        if self._reverse is None:
+            columns = {}
+            for source, mask in self.rows.items():
+                for sink in bit_positions(mask):
+                    columns[sink] = columns.get(sink, 0) | 1 << source
+            self._reverse = columns
+        returned = frozenset(bit_positions(self._reverse.get(node, 0)))
+        extra = self._extra.predecessors(node)
+        return returned.union(extra) if extra else returned
+
+    def out_degree(self, node) -> int:
+        if not self._in_domain(node):
+            return self._extra.out_degree(node)
+        return bin(self.rows.get(node, 0)).count('1') + self._extra.out_degree(node)
+
+    def discard_all(self, another):
+        self.check_operations(another)
+        returned = self.copy()
+        if isinstance(another, BitOperationsSet) and another.size == self.size:
+            for source, mask in another.rows.items():
+                row = returned.rows.get(source, 0) & ~mask
+                if row:
+                    returned.rows[source] = row
+                else:
+                    returned.rows.pop(source, None)
+            for operation in another._extra:
+                returned._extra.discard(operation)
+            return returned
+        for operation in another:
+            returned.discard(operation)
+        return returned
+
+    def __or__(self, another):
+        return self.union(another)
+
+    def __sub__(self, another):
+        return self.discard_all(another)
+
+    def intersection(self, *others):
+        returned = self
+        for other in others:
+            returned = returned & other
+        return returned if others else self.copy()
+
+    def difference(self, *others):
+        returned = self.copy()
+        for other in others:
+            for operation in other:
+                returned.discard(operation)
+        return returned
+
+    def symmetric_difference(self, other):
+        return self ^ other
+
+    def issubset(self, other) -> bool:
+        return all(operation in other for operation in self)
+
+    def issuperset(self, other) -> bool:
+        return all(operation in self for operation in other)
+
+    def intersection_update(self, *others):
+        kept = self.intersection(*others)
+        self.clear()
+        self.update(kept)
+
+    def difference_update(self, *others):
+        for other in others:
+            for operation in list(other):
+                self.discard(operation)
+
+    def symmetric_difference_update(self, other):
+        self ^= other
+
+    def __iter__(self):
+        for source in sorted(self.rows):
+            for sink in bit_positions(self.rows[source]):
+                yield FreezedOperation(self.operator, source, sink)
+        yield from self._extra
+
+    def __len__(self):
+        return sum(bin(mask).count('1') for mask in self.rows.values()) + len(self._extra)
+
+    def __contains__(self, operation):
+        if not isinstance(operation, FreezedOperation) or operation.operator != self.operator:
+            return False
+        source, sink = operation.source, operation.sink
+        if self._in_domain(source) and self._in_domain(sink):
+            return bool(self.rows.get(source, 0) >> sink & 1)
+        return operation in self._extra
+
+    def __eq__(self, other):
+        if isinstance(other, BitOperationsSet) and other.size == self.size:
+            return self.operator == other.operator and \
+                self.rows == other.rows and self._extra == other._extra
+        if isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(operation in self for operation in other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (BitOperationsSet, (list(self), self.operator, self.size))
+
+    def __repr__(self):
+        return 'BitOperationsSet({{{}}})'.format(', '.join(map(repr, self)))
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+from array import array
+from typing import Callable, Mapping
+
+from .category import Category
+from .operation import OperationsSet, BitOperationsSet, bit_positions
+
+
+"""
+Flattens the operations of a term into arrays, which can be evaluated again and again
+without building the terms or the FreezedOperations.
+"""
+
+
+class EvaluationPlan:
+    """
+    The operations in the evaluation order as a compressed sparse row matrix. The nodes
+    are interned to the ids, sources holds the source id of each row, offsets the start of
+    each row in sinks and sinks the sink ids.
+
+    >>> I, O, C = from_operator(debug)
+    >>> plan = compile_term(C(1, 2) * (C(3) + I) * C(4))
+    >>> plan
+    EvaluationPlan(nodes=4, operations=5)
+    >>> plan.run()
+    1 -> 3
+    1 -> 4
+    2 -> 3
+    2 -> 4
+    3 -> 4
+    >>> plan.run(bindings={1: 'a', 4: 'b'})
+    a -> 3
+    a -> b
+    2 -> 3
+    2 -> b
+    3 -> b
+    >>> connected = []
+    >>> plan.run(lambda source, sink: connected.append((source, sink)))
+    >>> len(connected)
+    5
+
+    """
+
+    def __init__(self, operator: Callable, nodes: tuple, sources: array, offsets: array, sinks: array):
+        self.operator = operator
+        self.nodes = nodes
+        self.sources = sources
+        self.offsets = offsets
+        self.sinks = sinks
+
+    def __len__(self):
+        return len(self.sinks)
+
+    def edges(self):
+        """
+        The (source, sink) node pairs in the evaluation order
+        """
+        nodes, sinks, offsets = self.nodes, self.sinks, self.offsets
+        for row, source in enumerate(self.sources):
+            for position in range(offsets[row], offsets[row + 1]):
+                yield nodes[source], nodes[sinks[position]]
+
+    def run(self, operator: Callable = None, bindings: Mapping = None):
+        """
+        Calls the operator, by default the one of the compiled term, for each operation.
+        The bindings map the nodes of the term to the values given to the operator.
+        """
+        if operator is None:
+            operator = self.operator
+        values = self.nodes
+        if bindings is not None:
+            values = [bindings.get(node, node) for node in values]
+        sinks, offsets = self.sinks, self.offsets
+        for row, source in enumerate(self.sources):
+            source = values[source]
+            for position in range(offsets[row], offsets[row + 1]):
+                operator(source, values[sinks[position]])
+
+    def __repr__(self):
+        return 'EvaluationPlan(nodes={}, operations={})'.format(len(self.nodes), len(self))
+
+
+def _sorted_rows(operations: OperationsSet) -> list:
+    if isinstance(operations, BitOperationsSet) and not operations._extra:
+        return [(source, list(bit_positions(operations.rows[source])))
+                for source in sorted(operations.rows)]
+    rows = []
+    for operation in operations.as_sorted_list:
+        if rows and rows[-1][0] == operation.source:
+            rows[-1][1].append(operation.sink)
+        else:
+            rows.append((operation.source, [operation.sink]))
+    return rows
+
+
+def compile_term(term: Category) -> EvaluationPlan:
+    """
+    Compiles the operations of the term, or of an OperationsSet, into an EvaluationPlan
+    evaluating them in the same order as the term.evaluate()
+    """
+    operations = term if isinstance(term, (OperationsSet, BitOperationsSet)) else term.operations
+    ids = {}
+    nodes = []
+
+    def intern(node) -> int:
+        node_id = ids.get(node, None)
+        if node_id is None:
+            node_id = ids[node] = len(nodes)
+            nodes.append(node)
+        return node_id
+
+    sources = array('q')
+    offsets = array('q', [0])
+    sinks = array('q')
+    for source, row in _sorted_rows(operations):
+        sources.append(intern(source))
+        sinks.extend(intern(sink) for sink in row)
+        offsets.append(len(sinks))
+    return EvaluationPlan(operations.operator, tuple(nodes), sources, offsets, sinks)
@@ -24,6 +24,8 @@ class CategoryOperations(enum.Enum):
 
 
 class IPrintableTerm(Category, metaclass=abc.ABCMeta):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def needs_parenthesis_on_print(self) -> bool:
@@ -72,6 +74,8 @@ class ProcessedTerm:
 
     """
 
+    __slots__ = ('_source', '_operation', '_sink')
+
     def __init__(
             self,
             sink: IPrintableTerm = None,
@@ -83,14 +87,20 @@ class ProcessedTerm:
         self._operation = operation
         self._sink = source
 
-    def __str__(self):
+    def format(self, sink: str, source: str) -> str:
+        """
+        The printout with the given printouts of the sink and the source
+        """
         if not self.sink.needs_parenthesis_on_print():
             if not self.source.needs_parenthesis_on_print():
-                return "{} {} {}".format(self.sink, self.operation.value, self.source)
-            return "{} {} ({})".format(self.sink, self.operation.value, self.source)
+                return "{} {} {}".format(sink, self.operation.value, source)
+            return "{} {} ({})".format(sink, self.operation.value, source)
         if not self.source.needs_parenthesis_on_print():
-            return "({}) {} {}".format(self.sink, self.operation.value, self.source)
-        return "({}) {} ({})".format(self.sink, self.operation.value, self.source)
+            return "({}) {} {}".format(sink, self.operation.value, source)
+        return "({}) {} ({})".format(sink, self.operation.value, source)
+
+    def __str__(self):
+        return self.format(str(self.sink), str(self.source))
 
     def __repr__(self):
         return str(self)
@@ -0,0 +1,152 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+"""
+On-disk store for the search results, so that the repeated runs can skip the searches
+they have already done. The store is a SQLite database in the WAL mode, which lets
+several processes read it while one of them writes.
+"""
+
+
+class SimplificationStore:
+    """
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'store.sqlite')
+    >>> store = SimplificationStore(path, max_bytes=200)
+    >>> store.get('a') is None
+    True
+    >>> store.put('a', ('C', 1))
+    >>> store.get('a')
+    ('C', 1)
+    >>> for i in range(10):
+    ...    store.put(str(i), list(range(10)))
+    >>> stats = store.stats()
+    >>> stats['bytes'] <= 200 and stats['evictions'] > 0
+    True
+    >>> store.put('9', 'replaced')
+    >>> store.stats()['bytes'] == store._connection.execute(
+    ...    'SELECT sum(length(value)) FROM results').fetchone()[0]
+    True
+    >>> SimplificationStore(path).get('9')
+    'replaced'
+    >>> store.clear()
+    >>> store.stats()['entries']
+    0
+
+    """
+
+    def __init__(
+            self, path: str, max_bytes: int = None, timeout: float = 30.0,
+            touch_interval: float = 60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        # the access times are only approximate, so that most reads do not need to write
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        # the running total of the value sizes, so that the puts do not sum the table
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self._connection.execute(
+            "INSERT OR IGNORE INTO meta (name, value) "
+            "SELECT 'bytes', coalesce(sum(length(value)), 0) FROM results")
+
+    def get(self, key: str):
+        row = self._connection.execute(
+            'SELECT value, accessed FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] >= self.touch_interval:
+            try:
+                self._connection.execute(
+                    'UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                # the database is busy, and the entry just ages a bit faster
+                pass
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction():
+            row = self._connection.execute(
+                'SELECT length(value) FROM results WHERE key = ?', (key,)).fetchone()
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, accessed) VALUES (?, ?, ?)',
+                (key, blob, time.time()))
+            self._add_size(len(blob) - (0 if row is None else row[0]))
+            if self.max_bytes is not None:
+                self._evict()
+
+    @contextmanager
+    def _transaction(self):
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def _evict(self):
+        total = self._size()
+        if total <= self.max_bytes:
+            return
+        # evicts down to a bit below the limit, so that the next puts do not evict again
+        target = self.max_bytes * 9 // 10
+        keys = []
+        freed = 0
+        rows = self._connection.execute(
+            'SELECT key, length(value) FROM results ORDER BY accessed')
+        for key, length in rows:
+            if total - freed <= target:
+                break
+            keys.append((key,))
+            freed += length
+        rows.close()
+        self._connection.executemany('DELETE FROM results WHERE key = ?', keys)
+        self._add_size(-freed)
+        self.evictions += len(keys)
+
+    def _add_size(self, change: int):
+        self._connection.execute(
+            "UPDATE meta SET value = value + ? WHERE name = 'bytes'", (change,))
+
+    def _size(self) -> int:
+        return self._connection.execute(
+            "SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+
+    def clear(self):
+        with self._transaction():
+            self._connection.execute('DELETE FROM results')
+            self._connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+
+    def close(self):
+        self._connection.close()
+
+    def stats(self) -> dict:
+        return {
+            'entries': self._connection.execute('SELECT count(*) FROM results').fetchone()[0],
+            'bytes': self._size(),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions}
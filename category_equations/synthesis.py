@@ -0,0 +1,146 @@
+"""
+   @copyright: 2010 - 2026 by Pauli Rikula <pauli.rikula@gmail.com>
+   @license: MIT <https://opensource.org/license/mit>
+"""
+
+from .category import Category
+from .operation import OperationsSet, BitOperationsSet
+from .term import IEquationTerm
+
+
+"""
+Builds compact equations directly from the connections instead of searching them with
+the simplify.
+"""
+
+
+def _sorted_nodes(nodes) -> list:
+    return sorted(nodes, key=repr)
+
+
+def _biclique_cover(edges: set) -> list:
+    """
+    Groups the sources with identical sinks, or the sinks with identical sources, and
+    returns the smaller of the two covers as a list of (sources, sinks) -blocks.
+    """
+    sinks_of = {}
+    sources_of = {}
+    for source, sink in edges:
+        sinks_of.setdefault(source, set()).add(sink)
+        sources_of.setdefault(sink, set()).add(source)
+
+    by_sinks = {}
+    for source, sinks in sinks_of.items():
+        by_sinks.setdefault(frozenset(sinks), set()).add(source)
+    by_sources = {}
+    for sink, sources in sources_of.items():
+        by_sources.setdefault(frozenset(sources), set()).add(sink)
+
+    if len(by_sinks) <= len(by_sources):
+        blocks = [(frozenset(sources), sinks) for sinks, sources in by_sinks.items()]
+    else:
+        blocks = [(sources, frozenset(sinks)) for sources, sinks in by_sources.items()]
+    blocks.sort(key=lambda block: (repr(_sorted_nodes(block[0])), repr(_sorted_nodes(block[1]))))
+    return blocks
+
+
+def synthesize(network, I, O, C) -> IEquationTerm:
+    """
+    Builds a compact equation for the network, which can be a term, an OperationsSet or
+    an iterable of (source, sink) -pairs. For the pairs the result equals to the sum of
+    C(source) * C(sink) -terms:
+
+    >>> I, O, C = from_operator(debug)
+    >>> edges = [(1, 3), (1, 4), (2, 3), (2, 4), (3, 5), (4, 5)]
+    >>> compact = synthesize(edges, I, O, C)
+    >>> compact
+    (C(1, 2) + I) * C(3, 4) * (C(5) + I)
+    >>> naive = C(1) * C(3) + C(1) * C(4) + C(2) * C(3) + C(2) * C(4) + C(3) * C(5) + C(4) * C(5)
+    >>> compact == naive
+    True
+
+    The complete bipartite blocks become products, the blocks sharing a middle are
+    chained with I and the loose ends the network does not expose are terminated with O:
+
+    >>> a = C(1) * C(2) * C(4) + O * C(3) * C(4)
+    >>> b = synthesize(a, I, O, C)
+    >>> b
+    C(1) * C(2) * O + O * C(2, 3) * C(4)
+    >>> a == b
+    True
+
+    >>> synthesize([], I, O, C)
+    O
+
+    """
+    if isinstance(network, Category):
+        edges = set((operation.source, operation.sink) for operation in network.operations)
+        exposed_sinks = set(network.sinks)
+        exposed_sources = set(network.sources)
+    else:
+        if isinstance(network, (OperationsSet, BitOperationsSet)):
+            edges = set((operation.source, operation.sink) for operation in network)
+        else:
+            edges = set(network)
+        exposed_sinks = set(source for source, _ in edges)
+        exposed_sources = set(sink for _, sink in edges)
+
+    blocks = _biclique_cover(edges)
+
+    # the blocks which can be shown as they are and their position by the left side
+    exposed = [
+        block for block in blocks
+        if block[0] <= exposed_sinks and block[1] <= exposed_sources]
+    exposed_by_left = {block[0]: block for block in exposed}
+
+    terms = []
+    used = set()
+    covered_sinks = set()
+    covered_sources = set()
+    for block in blocks:
+        if block in used:
+            continue
+        used.add(block)
+        left, right = block
+        if block in exposed_by_left.values():
+            covered_sinks.update(left)
+            covered_sources.update(right)
+            following = exposed_by_left.get(right, None)
+            if following is not None and following not in used:
+                used.add(following)
+                covered_sinks.update(following[0])
+                covered_sources.update(following[1])
+                terms.append(
+                    (C(*_sorted_nodes(left)) + I) * C(*_sorted_nodes(right)) * \
+                        (C(*_sorted_nodes(following[1])) + I))
+                continue
+            terms.append(C(*_sorted_nodes(left)) * C(*_sorted_nodes(right)))
+            continue
+
+        term = C(*_sorted_nodes(left)) * C(*_sorted_nodes(right))
+        if left <= exposed_sinks:
+            covered_sinks.update(left)
+        else:
+            term = O * term
+        if right <= exposed_sources:
+            covered_sources.update(right)
+        else:
+            term = term * O
+        terms.append(term)
+
+    loose_sinks = exposed_sinks - covered_sinks
+    loose_sources = exposed_sources - covered_sources
+    both = loose_sinks & loose_sources
+    if both:
+        terms.append(C(*_sorted_nodes(both)))
+    if loose_sinks - both:
+        terms.append(C(*_sorted_nodes(loose_sinks - both)) * O)
+    if loose_sources - both:
+        terms.append(O * C(*_sorted_nodes(loose_sources - both)))
+
+    if not terms:
+        return O
+    result = terms[0]
+    for term in terms[1:]:
+        result = result + term
+    return result
@@ -7,13 +7,17 @@ import copy
 import abc
 from typing import Set, Callable
 
-from .operation import OperationsSet
+from .operation import OperationsSet, BitOperationsSet, FreezedOperation
 from .category import Category
+from .nodes import CompactNodes
+from .memory import memory_report
 from .processed_term import CategoryOperations, ProcessedTerm, IPrintableTerm
 
 
 
 class IEquationTerm(IPrintableTerm, metaclass=abc.ABCMeta):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def processed_term(self) -> ProcessedTerm:
@@ -29,94 +33,383 @@ class _Set_operations:
 
     @staticmethod
     def discard_b_from_a(a, b):
+        if isinstance(a, CompactNodes):
+            return a.without(b)
         c = copy.copy(a)
         for key in b:
             c.discard(key)
         return c
 
+    @staticmethod
+    def replace_identity(nodes, replacement):
+        """
+        The nodes with the identity replaced by the replacement nodes
+        """
+        if isinstance(nodes, CompactNodes):
+            # the identity can only be among the extras of the compact collection
+            if not nodes.extras:
+                return nodes
+            new_nodes = nodes.without(nodes.extras)
+            for v in nodes.extras:
+                if isinstance(v, Identity) and v.is_identity():
+                    new_nodes = new_nodes.union(replacement)
+                elif isinstance(v, Identity) and v.is_zero():
+                    continue
+                else:
+                    new_nodes = new_nodes.union([v])
+            return new_nodes
+        new_nodes = set([])
+        for v in nodes:
+            if isinstance(v, Identity) and v.is_identity():
+                new_nodes.update(replacement)
+            elif isinstance(v, Identity) and v.is_zero():
+                continue
+            else:
+                new_nodes.add(v)
+        return new_nodes
+
+    @staticmethod
+    def rebind_identity(nodes, identity, operator: Callable, rebound: dict):
+        """
+        The nodes with the identity, or the ones equal to it, replaced by the identity of
+        the operator. The rebound keeps the replacement, so that all the nodes of a term
+        get the same one.
+        """
+        if nodes is None or identity not in nodes:
+            return nodes
+        if identity not in rebound:
+            candidates = nodes.extras if isinstance(nodes, CompactNodes) else nodes
+            old = next(v for v in candidates if isinstance(v, Identity) and v == identity)
+            rebound[identity] = old.with_operator(operator)
+        return _Set_operations.discard_b_from_a(nodes, [identity]).union([rebound[identity]])
+
+    @staticmethod
+    def without_identities(nodes):
+        """
+        The nodes, which can be connected
+        """
+        if isinstance(nodes, CompactNodes):
+            identities = [v for v in nodes.extras if isinstance(v, Identity)]
+            return nodes.without(identities) if identities else nodes
+        return [v for v in nodes if not isinstance(v, Identity)]
+
+def _empty_operations(operator: Callable, domain=None) -> OperationsSet:
+    if domain is None:
+        return OperationsSet([], operator=operator)
+    return domain.operations(operator)
+
+
 class EquationTerm(IEquationTerm):
+    __slots__ = ('_processed_term', '_keep_history')
 
-    def __init__(self, processed_term: ProcessedTerm = None, **rest):
+    def __init__(self, processed_term: ProcessedTerm = None, keep_history: bool = True, **rest):
         self._processed_term = processed_term
+        self._keep_history = keep_history
         super().__init__(**rest)
 
     @property
     def processed_term(self) -> ProcessedTerm:
         return self._processed_term
 
+    @property
+    def keep_history(self) -> bool:
+        """
+        Whether the results of the operations remember how they were made
+        """
+        return self._keep_history
+
+    def _derive(self, operation: CategoryOperations, anext: Category) -> IEquationTerm:
+        operator = anext.operator if operation == CategoryOperations.ARROW else self.operator
+        if self.keep_history and getattr(anext, 'keep_history', True):
+            return MediateTerm(
+                operator=operator,
+                processed_term=ProcessedTerm(self, operation, anext))
+        sinks, sources = self._nodes_of(operation, anext)
+        return CompactTerm(
+            operator=operator,
+            sinks=sinks,
+            sources=sources,
+            operations=self._operations_of(operation, anext))
+
+    @abc.abstractmethod
+    def structural_key(self) -> tuple:
+        """
+        Hashable and picklable description of how the term was written. Terms with equal
+        keys print the same way and can be rebuilt from the key.
+        """
+        raise NotImplementedError
+
+    def _fold(self, leaf: Callable, node: Callable):
+        """
+        Computes a value of the term from the values of its subterms children first with
+        an explicit stack like in MediateTerm._force. The leaf gives the value of the other
+        than MediateTerms and the node the value of a MediateTerm from the values of its
+        sink and source. Each shared subterm is computed once.
+        """
+        values = {}
+        stack = [(self, False)]
+        while stack:
+            term, children_done = stack.pop()
+            if id(term) in values:
+                continue
+            processed_term = term.processed_term
+            if not isinstance(term, MediateTerm):
+                values[id(term)] = leaf(term)
+            elif children_done:
+                values[id(term)] = node(
+                    term, values[id(processed_term.sink)], values[id(processed_term.source)])
+            else:
+                stack.append((term, True))
+                stack.append((processed_term.source, False))
+                stack.append((processed_term.sink, False))
+        return values[id(self)]
+
+    def stats(self) -> dict:
+        """
+        Reports how much the term repeats itself. The terms is the size of the term as a
+        tree, the objects is the number of distinct term objects in it and the unique is
+        the number of structurally distinct subterms:
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C(1, 2) * C(3, 4) + C(1, 2) * C(3, 4) * C(5)
+        >>> a.stats()
+        {'terms': 9, 'objects': 9, 'unique': 6, 'duplicated': 3}
+
+        The deep terms are walked without recursion:
+
+        >>> c = C(0)
+        >>> for i in range(1, 3000):
+        ...     c = c * C(i % 3)
+        >>> c.stats()
+        {'terms': 5999, 'objects': 5999, 'unique': 3002, 'duplicated': 2997}
+
+        """
+        objects = set()
+
+        def tree_size(term, *sizes) -> int:
+            objects.add(id(term))
+            return 1 + sum(sizes)
+
+        terms = self._fold(tree_size, tree_size)
+        table = SubtermTable()
+        table.canonical(self)
+        return {
+            'terms': terms,
+            'objects': len(objects),
+            'unique': len(table),
+            'duplicated': len(objects) - len(table)}
+
+    def memory_report(self) -> dict:
+        """
+        The bytes used by the term by category, see the memory_report function
+        """
+        return memory_report(self)
+
+    def _operation_parts(self):
+        """
+        Walks the processed terms without computing their operations. Yields the
+        ('block', sources, sinks) cross products made by the arrows, the ('discard', term)
+        terms and the ('edges', term) terms, whose operations are already at hand.
+        Each shared subterm is visited once.
+        """
+        seen = set()
+        stack = [self]
+        while stack:
+            term = stack.pop()
+            if id(term) in seen:
+                continue
+            seen.add(id(term))
+            processed_term = term.processed_term
+            if processed_term is None or term._operations is not None:
+                yield 'edges', term
+                continue
+            operation = processed_term.operation
+            sink, source = processed_term.sink, processed_term.source
+            if operation == CategoryOperations.DISCARD:
+                yield 'discard', term
+            elif operation == CategoryOperations.ADD:
+                stack.extend((sink, source))
+            elif isinstance(sink, (Identity, Zero)):
+                stack.append(source)
+            elif source.is_identity() or source.is_zero():
+                stack.append(sink)
+            else:
+                stack.extend((sink, source))
+                yield 'block', sink.sources, source.sinks
+
+    def edge_count(self) -> int:
+        """
+        The number of the operations in the term. The arrows are counted as the cross
+        products of their sources and sinks, grouping the sources by the products they
+        belong to, so the operations are not computed. Only the discarded parts are.
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C.range(0, 1000) * (C.range(1000, 3000) + I) * C.range(2000, 5000)
+        >>> a.edge_count()
+        10000000
+        >>> b = C(1, 2) * C(3, 4) + C(1) * C(4, 5) - C(1) * C(3)
+        >>> b.edge_count() == len(b.operations)
+        True
+
+        """
+        blocks = []
+        for kind, *part in self._operation_parts():
+            if kind == 'block':
+                sources, sinks = part
+                blocks.append((
+                    _Set_operations.without_identities(sources),
+                    _Set_operations.without_identities(sinks)))
+                continue
+            operations = part[0].operations
+            for source in set(operation.source for operation in operations):
+                blocks.append(((source,), operations.successors(source)))
+
+        signatures = {}
+        for number, (sources, sinks) in enumerate(blocks):
+            if not sinks:
+                continue
+            for source in sources:
+                signatures.setdefault(source, []).append(number)
+        groups = {}
+        for signature in signatures.values():
+            signature = tuple(signature)
+            groups[signature] = groups.get(signature, 0) + 1
+
+        count = 0
+        for signature, sources in groups.items():
+            if len(signature) == 1:
+                count += sources * len(blocks[signature[0]][1])
+            else:
+                count += sources * len(set().union(*(blocks[number][1] for number in signature)))
+        return count
+
+    def with_operator(self, operator: Callable) -> IEquationTerm:
+        """
+        The term connecting the same nodes with the other operator. The terms with
+        history are rebound subterm by subterm, so the history is kept, the computed sinks
+        and sources are shared and the operations are built on demand:
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C(1, 2) * (C(3) + I) * C(4)
+        >>> connected = []
+        >>> b = a.with_operator(lambda source, sink: connected.append((source, sink)))
+        >>> b
+        C(1, 2) * (C(3) + I) * C(4)
+        >>> b._operations is None
+        True
+        >>> b.evaluate()
+        >>> len(connected), b.edge_count(), b.sinks == a.sinks
+        (5, 5, True)
+
+        The I of the old operator is replaced also in the computed nodes:
+
+        >>> a = C(1) + I
+        >>> a.sinks
+        {1, I}
+        >>> b = a.with_operator(print)
+        >>> b == a.with_operator(print), b == a
+        (True, False)
+        >>> b.with_operator(debug) == a
+        True
+        >>> [node.operator for node in b.sinks if node == b.processed_term.source]
+        [<built-in function print>]
+
+        The terms without history rebuild their operations with the other operator. For
+        only evaluating the term with another operator, evaluate(operator=...) does not
+        build anything:
+
+        >>> I, O, C = from_operator(debug, keep_history=False)
+        >>> (C(1, 2) * (C(3) + I) * C(4)).with_operator(print)
+        T(sinks=2, sources=1, operations=5)
+
+        """
+        identity = Identity(self.operator, self.keep_history)
+        rebound = {}
+        return CompactTerm(
+            operator=operator,
+            sinks=_Set_operations.rebind_identity(self.sinks, identity, operator, rebound),
+            sources=_Set_operations.rebind_identity(self.sources, identity, operator, rebound),
+            operations=self.operations.with_operator(operator))
+
+    def contains_edge(self, source, sink) -> bool:
+        """
+        Tells if the operation from the source to the sink is in the term without
+        computing the operations:
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C.range(0, 10 ** 6) * (C.range(10 ** 6, 2 * 10 ** 6) + I) * C(-1)
+        >>> a.contains_edge(5, -1), a.contains_edge(5, 10 ** 6), a.contains_edge(-1, 5)
+        (True, True, False)
+        >>> b = a - C(5) * C(-1)
+        >>> b.contains_edge(5, -1), b.contains_edge(6, -1)
+        (False, True)
+
+        """
+        if isinstance(source, Identity) or isinstance(sink, Identity):
+            return False
+        for kind, *part in self._operation_parts():
+            if kind == 'block':
+                sources, sinks = part
+                if source in sources and sink in sinks:
+                    return True
+            elif kind == 'discard':
+                processed_term = part[0].processed_term
+                if processed_term.sink.contains_edge(source, sink) and \
+                        not processed_term.source.contains_edge(source, sink):
+                    return True
+            else:
+                operations = part[0].operations
+                if FreezedOperation(operations.operator, source, sink) in operations:
+                    return True
+        return False
+
     def __add__(self, anext: Category) -> IEquationTerm:
-        result = MediateTerm(
-            operator=self.operator,
-            sinks=self.sinks.union(anext.sinks),
-            sources=self.sources.union(anext.sources),
-            operations=self.operations.union(anext.operations),
-            processed_term=ProcessedTerm(self, CategoryOperations.ADD, anext))
-        return result
+        return self._derive(CategoryOperations.ADD, anext)
 
     def __sub__(self, anext: Category) -> IEquationTerm:
-        result = MediateTerm(
-            operator=self.operator,
-            sinks=_Set_operations.discard_b_from_a(self.sinks, anext.sinks),
-            sources=_Set_operations.discard_b_from_a(self.sources, anext.sources),
-            operations=self.operations.discard_all(anext.operations),
-            processed_term=ProcessedTerm(self, CategoryOperations.DISCARD, anext))
-        return result
+        return self._derive(CategoryOperations.DISCARD, anext)
 
     def __mul__(self, anext: Category) -> IEquationTerm:
-        if anext.is_identity():
-            return MediateTerm(
-                sinks=self.sinks,
-                sources=self.sources,
-                operations=self.operations,
-                operator=anext.operator,
-                processed_term=ProcessedTerm(self, CategoryOperations.ARROW, anext))
+        return self._derive(CategoryOperations.ARROW, anext)
+
+    def _nodes_of(self, operation: CategoryOperations, anext: Category) -> tuple:
+        """
+        The sinks and sources of the result of the operation
+        """
+        if operation == CategoryOperations.ADD:
+            return self.sinks.union(anext.sinks), self.sources.union(anext.sources)
+        if operation == CategoryOperations.DISCARD:
+            return (
+                _Set_operations.discard_b_from_a(self.sinks, anext.sinks),
+                _Set_operations.discard_b_from_a(self.sources, anext.sources))
 
+        if anext.is_identity():
+            return self.sinks, self.sources
         if anext.is_zero():
-            return MediateTerm(
-                sinks=self.sinks,
-                sources=set(),
-                operations=self.operations,
-                operator=anext.operator,
-                processed_term=ProcessedTerm(self, CategoryOperations.ARROW, anext))
-
-        new_operations = OperationsSet([], operator=self.operator)
-        for source in self.sources:
-            if isinstance(source, Identity):
-                if source.is_identity() or source.is_zero():
-                    continue
-            for sink in anext.sinks:
-                if isinstance(sink, Identity):
-                    if sink.is_identity() or sink.is_zero():
-                        continue
-                #print source,'---', sink
-                new_operations.add_freezed_operation(source, sink)
-
-        new_sources = set([])
-        for v in anext.sources:
-            if isinstance(v, Identity) and v.is_identity():
-                new_sources.update(self.sources)
-            elif isinstance(v, Identity) and v.is_zero():
-                continue
-            else:
-                new_sources.add(v)
+            return self.sinks, copy.copy(anext.sources)
 
-        new_sinks = set([])
-        for v in self.sinks:
-            if isinstance(v, Identity) and v.is_identity():
-                new_sinks.update(anext.sinks)
-            elif isinstance(v, Identity) and v.is_zero():
-                continue
-            else:
-                new_sinks.add(v)
+        return (
+            _Set_operations.replace_identity(self.sinks, anext.sinks),
+            _Set_operations.replace_identity(anext.sources, self.sources))
 
-        operations = self.operations.union(anext.operations).union(new_operations)
-        result = MediateTerm(
-            operator=anext.operator,
-            sinks=new_sinks,
-            sources=new_sources,
-            operations=operations,
-            processed_term=ProcessedTerm(self, CategoryOperations.ARROW, anext))
-        return result
+    def _operations_of(self, operation: CategoryOperations, anext: Category) -> OperationsSet:
+        """
+        The operations of the result of the operation
+        """
+        if operation == CategoryOperations.ADD:
+            return self.operations.union(anext.operations)
+        if operation == CategoryOperations.DISCARD:
+            return self.operations.discard_all(anext.operations)
+
+        if anext.is_identity() or anext.is_zero():
+            return self.operations
+
+        new_operations = self.operations.new_empty()
+        new_operations.connect(
+            _Set_operations.without_identities(self.sources),
+            _Set_operations.without_identities(anext.sinks))
+
+        return self.operations.union(anext.operations).union(new_operations)
 
 
 class Identity(EquationTerm):
@@ -152,27 +445,53 @@ class Identity(EquationTerm):
     
     >>> I ==(O+O)
     False
-    
+
+    The identities of the same operator are equal, even when they are made separately:
+
+    >>> I == from_operator(debug)[0], C(1) + I == C(1) + from_operator(debug)[0]
+    (True, True)
+
     """
 
-    def __init__(self, operator: Callable = None):
+    __slots__ = ('_domain',)
+
+    def __init__(self, operator: Callable = None, keep_history: bool = True, domain=None):
+        self._domain = domain
+        nodes = set([self]) if domain is None else domain.nodes([self])
         super().__init__(
-            sources=set([self]),
-            sinks=set([self]),
-            operations=OperationsSet([], operator=operator),
-            operator=operator)
+            sources=nodes,
+            sinks=nodes,
+            operations=_empty_operations(operator, domain),
+            operator=operator,
+            keep_history=keep_history)
 
-    def __mul__(self, anext: Category) -> Category:
-        return MediateTerm(
-            sinks=anext.sinks,
-            sources=anext.sources,
-            operations=anext.operations,
-            operator=anext.operator,
-            processed_term=ProcessedTerm(self, CategoryOperations.ARROW, anext))
+    def _nodes_of(self, operation: CategoryOperations, anext: Category) -> tuple:
+        if operation == CategoryOperations.ARROW:
+            return anext.sinks, anext.sources
+        return super()._nodes_of(operation, anext)
+
+    def _operations_of(self, operation: CategoryOperations, anext: Category) -> OperationsSet:
+        if operation == CategoryOperations.ARROW:
+            return anext.operations
+        return super()._operations_of(operation, anext)
+
+    def with_operator(self, operator: Callable) -> IEquationTerm:
+        return Identity(operator, self.keep_history, self._domain)
+
+    def __eq__(self, other):
+        if isinstance(other, Identity):
+            # the I is its own sink and source, so comparing the nodes would not end
+            return self.operator == other.operator
+        return super().__eq__(other)
+
+    __hash__ = EquationTerm.__hash__
 
     def __str__(self):
         return 'I'
 
+    def structural_key(self) -> tuple:
+        return ('I',)
+
     def is_identity(self) -> bool:
         return True
 
@@ -222,24 +541,36 @@ class Zero(EquationTerm):
 
     """
 
-    def __init__(self, operator: Callable = None):
+    __slots__ = ('_domain',)
+
+    def __init__(self, operator: Callable = None, keep_history: bool = True, domain=None):
+        self._domain = domain
         super().__init__(
-            sources=set([]),
-            sinks=set([]),
-            operations=OperationsSet([], operator=operator),
-            operator=operator)
+            sources=set([]) if domain is None else domain.nodes(),
+            sinks=set([]) if domain is None else domain.nodes(),
+            operations=_empty_operations(operator, domain),
+            operator=operator,
+            keep_history=keep_history)
 
-    def __mul__(self, anext: Category) -> Category:
-        return MediateTerm(
-            sinks=set([]),
-            sources=anext.sources,
-            operations=anext.operations,
-            operator=anext.operator,
-            processed_term=ProcessedTerm(self, CategoryOperations.ARROW, anext))
+    def _nodes_of(self, operation: CategoryOperations, anext: Category) -> tuple:
+        if operation == CategoryOperations.ARROW:
+            return self.sinks, anext.sources
+        return super()._nodes_of(operation, anext)
+
+    def _operations_of(self, operation: CategoryOperations, anext: Category) -> OperationsSet:
+        if operation == CategoryOperations.ARROW:
+            return anext.operations
+        return super()._operations_of(operation, anext)
+
+    def with_operator(self, operator: Callable) -> IEquationTerm:
+        return Zero(operator, self.keep_history, self._domain)
 
     def __str__(self) -> str:
         return 'O'
 
+    def structural_key(self) -> tuple:
+        return ('O',)
+
     def is_identity(self) -> bool:
         return False
 
@@ -252,12 +583,52 @@ class Zero(EquationTerm):
 
 
 class Adder(EquationTerm):
+    __slots__ = ('_items', '_domain')
+
+    def __init__(self, items: Set[object], operator = None, keep_history: bool = True, domain=None):
+        """
+        The items can be a CompactNodes collection, which is then shared as the sinks and
+        sources as it is:
+
+        >>> I, O, C = from_operator(debug)
+        >>> a = C.range(0, 10 ** 6)
+        >>> a
+        C.range(0, 1000000)
+        >>> a.sinks is a.sources
+        True
+        >>> a + C.range(10 ** 6, 2 * 10 ** 6)
+        C.range(0, 1000000) + C.range(1000000, 2000000)
+        >>> (a + C.range(10 ** 6, 2 * 10 ** 6)).sinks
+        NodeRange(0, 2000000)
+        >>> (C(1, 2) * C.range(10, 13) - C.range(12, 13)).sources
+        NodeRange(10, 12)
+        >>> (C(1, 2) * C.range(10, 13)).evaluate()
+        1 -> 10
+        1 -> 11
+        1 -> 12
+        2 -> 10
+        2 -> 11
+        2 -> 12
+        >>> C.from_array(array('q', [3, 1, 2, 2])) == C(1, 2, 3)
+        True
+        >>> C.from_array(range(1000))
+        C.from_array([0, 1, 2, ..., 997, 998, 999])
+
+        """
+        self._items = items
+        self._domain = domain
+        if isinstance(items, CompactNodes):
+            super().__init__(
+                sources=items,
+                sinks=items,
+                operations=_empty_operations(operator, domain),
+                operator=operator,
+                keep_history=keep_history)
+            return
 
-    def __init__(self, items: Set[object], operator = None):
         sources = set([])
         sinks = set([])
-        operations = OperationsSet([], operator=operator)
-        self._items = items
+        operations = _empty_operations(operator, domain)
 
         for item in items:
             if isinstance(item, Identity):
@@ -267,12 +638,16 @@ class Adder(EquationTerm):
             else:
                 sources.add(item)
                 sinks.add(item)
+        if domain is not None:
+            sources = domain.nodes(sources)
+            sinks = domain.nodes(sinks)
 
         super().__init__(
             sources=sources,
             sinks=sinks,
             operations=operations,
-            operator=operator)
+            operator=operator,
+            keep_history=keep_history)
 
     def is_identity(self) -> bool:
         return False
@@ -281,24 +656,60 @@ class Adder(EquationTerm):
         return False
 
     def __str__(self):
+        if isinstance(self._items, CompactNodes):
+            return "C.{}".format(self._items)
         return "C({})".format(", ".join(map(str, self._items)))
 
+    def structural_key(self) -> tuple:
+        """
+        >>> I, O, C = from_operator(debug)
+        >>> sorted(C(1, I).structural_key()[1])
+        [('=', 1), ('I',)]
+        >>> C.range(0, 10).structural_key()
+        ('R', 0, 10)
+
+        """
+        if isinstance(self._items, CompactNodes):
+            return self._items.structural_key()
+        return ('C', frozenset(
+            item.structural_key() if isinstance(item, (Identity, Zero)) else ('=', item)
+            for item in self._items))
+
+    def with_operator(self, operator: Callable) -> IEquationTerm:
+        items = self._items
+        if not isinstance(items, CompactNodes):
+            items = set(
+                item.with_operator(operator) if isinstance(item, Identity) else item
+                for item in items)
+        return Adder(
+            items=items, operator=operator, keep_history=self.keep_history,
+            domain=self._domain)
+
     def combine(self, adder):
         if not isinstance(adder, Adder) or self.operator != adder.operator:
             raise ValueError
-        items = set()
-        items.update(self._items)
-        items.update(adder._items)
-        return Adder(items = items, operator=self.operator)
+        if isinstance(self._items, CompactNodes):
+            items = self._items.union(adder._items)
+        else:
+            items = set()
+            items.update(self._items)
+            items.update(adder._items)
+        return Adder(
+            items=items, operator=self.operator, keep_history=self.keep_history,
+            domain=self._domain)
 
     def reduce_to_additions(self):
+        def adder(items):
+            return Adder(
+                items=items, operator=self.operator, keep_history=self.keep_history,
+                domain=self._domain)
         if len(self._items) == 0:
-            return Adder(items=set(), operator=self.operator)
+            return adder(set())
         items = list(self._items)
         items.sort()
-        returned = Adder(items=set([items[0]]), operator=self.operator)
+        returned = adder(set([items[0]]))
         for item in items[1:]:
-            returned += Adder(items=set([item]), operator=self.operator)
+            returned += adder(set([item]))
         return returned
 
     def needs_parenthesis_on_print(self) -> bool:
@@ -307,6 +718,39 @@ class Adder(EquationTerm):
 
 
 class MediateTerm(EquationTerm):
+    """
+    The result of an operation on the terms. When the sinks, sources and operations are
+    not given, they are computed from the processed_term on the first access:
+
+    >>> I, O, C = from_operator(debug)
+    >>> a = C(1, 2) * C(3)
+    >>> a._sinks is None and a._operations is None
+    True
+    >>> a.sinks
+    {1, 2}
+    >>> a._operations is None
+    True
+    >>> a == C(1) * C(3) + C(2) * C(3)
+    True
+
+    The parts are computed without recursion, so the deep terms work too:
+
+    >>> b = C(0)
+    >>> for i in range(1, 3000):
+    ...     b = b + C(i)
+    >>> len(b.sinks)
+    3000
+    >>> c = C(0)
+    >>> for i in range(1, 3000):
+    ...     c = c * C(i)
+    >>> len(c.operations), len(c.sources)
+    (2999, 1)
+    >>> str(c).endswith('C(2998) * C(2999)')
+    True
+
+    """
+
+    __slots__ = ()
 
     def __init__(
             self,
@@ -317,17 +761,174 @@ class MediateTerm(EquationTerm):
             processed_term: ProcessedTerm = None):
         if processed_term is None:
             raise ValueError('processed_term should not be None')
+        if operator is None:
+            raise ValueError('operator should not be None')
+        if operations is not None and not isinstance(operations, (OperationsSet, BitOperationsSet)):
+            raise ValueError("expected OperationsSet, got {}".format(type(operations)))
+        if (sources is None) != (sinks is None):
+            raise ValueError('sources and sinks should be given together')
+        self._operator = operator
+        self._processed_term = processed_term
+        self._keep_history = True
+        self._sources = sources
+        self._sinks = sinks
+        self._operations = operations
+
+    def rewritten(self, processed_term: ProcessedTerm) -> IEquationTerm:
+        """
+        Returns an equal term written as the given processed_term. The parts of this term,
+        which are already computed, are shared with the returned term.
+        """
+        return MediateTerm(
+            operator=self.operator,
+            sources=self._sources,
+            sinks=self._sinks,
+            operations=self._operations,
+            processed_term=processed_term)
+
+    def _compute_nodes(self):
+        processed_term = self.processed_term
+        self._sinks, self._sources = processed_term.sink._nodes_of(
+            processed_term.operation, processed_term.source)
+
+    def _compute_operations(self):
+        processed_term = self.processed_term
+        self._operations = processed_term.sink._operations_of(
+            processed_term.operation, processed_term.source)
+
+    def _force(self, attribute: str, compute: Callable):
+        """
+        Computes the attribute of this term and of the MediateTerms under it, which do not
+        have it yet, children first with an explicit stack, so that the deep terms do not
+        run out of the recursion limit
+        """
+        seen = set()
+        stack = [(self, False)]
+        while stack:
+            term, children_done = stack.pop()
+            if children_done:
+                compute(term)
+                continue
+            if id(term) in seen:
+                continue
+            seen.add(id(term))
+            stack.append((term, True))
+            processed_term = term.processed_term
+            for child in (processed_term.source, processed_term.sink):
+                if isinstance(child, MediateTerm) and getattr(child, attribute) is None \
+                        and id(child) not in seen:
+                    stack.append((child, False))
+
+    @property
+    def sources(self) -> Set:
+        if self._sources is None:
+            self._force('_sinks', MediateTerm._compute_nodes)
+        return self._sources
+
+    @property
+    def sinks(self) -> Set:
+        if self._sinks is None:
+            self._force('_sinks', MediateTerm._compute_nodes)
+        return self._sinks
+
+    @property
+    def operations(self) -> OperationsSet:
+        if self._operations is None:
+            # the arrows connect the sources and the sinks of their operands
+            self._force('_sinks', MediateTerm._compute_nodes)
+            self._force('_operations', MediateTerm._compute_operations)
+        return self._operations
+
+
+    def with_operator(self, operator: Callable) -> IEquationTerm:
+        # the computed nodes are reused with the I of the new family in place of the old
+        identity = Identity(self.operator, self.keep_history)
+        rebound = {}
+
+        def leaf(term):
+            if isinstance(term, Identity):
+                if term not in rebound:
+                    rebound[term] = term.with_operator(operator)
+                return rebound[term]
+            return term.with_operator(operator)
+
+        def rebind(term, sink, source):
+            return MediateTerm(
+                operator=operator,
+                sources=_Set_operations.rebind_identity(term._sources, identity, operator, rebound),
+                sinks=_Set_operations.rebind_identity(term._sinks, identity, operator, rebound),
+                processed_term=ProcessedTerm(sink, term.processed_term.operation, source))
+        return self._fold(leaf, rebind)
+
+    def __str__(self) -> str:
+        return self._fold(str, lambda term, sink, source: term.processed_term.format(sink, source))
+
+    def structural_key(self) -> tuple:
+        return self._fold(
+            lambda term: term.structural_key(),
+            lambda term, sink, source: (term.processed_term.operation.value, sink, source))
+
+    def is_identity(self) -> bool:
+        return False
+
+    def is_zero(self) -> bool:
+        return False
+
+    def needs_parenthesis_on_print(self) -> bool:
+        return self.processed_term.operation in [CategoryOperations.ADD, CategoryOperations.DISCARD]
+
+
+
+class CompactTerm(EquationTerm):
+    """
+    The result of an operation on the terms, which do not keep history. Only the sinks,
+    sources and operations are kept, so the operands can be garbage collected.
+
+    >>> I, O, C = from_operator(debug, keep_history=False)
+    >>> a = C(1, 2) * C(3, 4) + C(1, 2) * C(5)
+    >>> a
+    T(sinks=2, sources=3, operations=6)
+    >>> a.processed_term is None
+    True
+    >>> a == C(1, 2) * C(3, 4, 5)
+    True
+    >>> a.evaluate()
+    1 -> 3
+    1 -> 4
+    1 -> 5
+    2 -> 3
+    2 -> 4
+    2 -> 5
+
+    """
+
+    __slots__ = ()
+
+    def __init__(
+            self,
+            operator: Callable = None,
+            sources: Set = None,
+            sinks: Set = None,
+            operations: OperationsSet = None):
         super().__init__(
             sources=sources,
             sinks=sinks,
             operations=operations,
             operator=operator,
-            processed_term=processed_term)
-
-
+            keep_history=False)
 
     def __str__(self) -> str:
-        return str(self.processed_term)
+        return "T(sinks={}, sources={}, operations={})".format(
+            len(self.sinks), len(self.sources), len(self.operations))
+
+    def structural_key(self) -> tuple:
+        def item_key(item):
+            return item.structural_key() if isinstance(item, (Identity, Zero)) else ('=', item)
+        return (
+            'T',
+            frozenset(item_key(item) for item in self.sinks),
+            frozenset(item_key(item) for item in self.sources),
+            frozenset((operation.source, operation.sink) for operation in self.operations))
 
     def is_identity(self) -> bool:
         return False
@@ -336,5 +937,115 @@ class MediateTerm(EquationTerm):
         return False
 
     def needs_parenthesis_on_print(self) -> bool:
-        return self.processed_term.operation in [CategoryOperations.ADD, CategoryOperations.DISCARD]
+        return False
+
+
+class SubtermTable:
+    """
+    Hash consing of the terms by their structure. The canonical term of a structure is
+    the first one seen and the terms built of the canonical subterms share them.
+
+    >>> I, O, C = from_operator(debug)
+    >>> table = SubtermTable()
+    >>> a = table.canonical(C(1) * C(2))
+    >>> b = table.canonical(C(1) * C(2))
+    >>> a is b
+    True
+    >>> c = table.canonical(C(1) * C(2) + C(3))
+    >>> c.processed_term.sink is a
+    True
 
+    The same looking terms of the different families are kept apart:
+
+    >>> def another(*arguments):
+    ...     return debug(*arguments)
+    >>> I2, O2, C2 = from_operator(another)
+    >>> table.canonical(C2(1) * C2(2)).processed_term.sink.operator is another
+    True
+
+    """
+
+    def __init__(self):
+        self._by_key = {}
+        # the terms are kept alive with their ids, so that the ids are not reused
+        self._by_id = {}
+        self.counts = {}
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def canonical(self, term: IEquationTerm) -> IEquationTerm:
+        # children first with an explicit stack, so that the deep terms do not recurse
+        stack = [(term, False)]
+        while stack:
+            current, children_done = stack.pop()
+            seen = self._by_id.get(id(current), None)
+            if seen is not None:
+                self.counts[id(seen[1])] += 1
+                continue
+            processed_term = current.processed_term
+            if processed_term is None:
+                canonical = self._by_key.setdefault(self._terminal_key(current), current)
+            elif not children_done:
+                stack.append((current, True))
+                stack.append((processed_term.source, False))
+                stack.append((processed_term.sink, False))
+                continue
+            else:
+                sink = self._by_id[id(processed_term.sink)][1]
+                source = self._by_id[id(processed_term.source)][1]
+                key = (processed_term.operation, id(sink), id(source))
+                canonical = self._by_key.get(key, None)
+                if canonical is None:
+                    if sink is processed_term.sink and source is processed_term.source:
+                        canonical = current
+                    elif processed_term.operation == CategoryOperations.ADD:
+                        canonical = sink + source
+                    elif processed_term.operation == CategoryOperations.DISCARD:
+                        canonical = sink - source
+                    else:
+                        canonical = sink * source
+                    self._by_key[key] = canonical
+
+            self._by_id[id(current)] = (current, canonical)
+            self.counts[id(canonical)] = self.counts.get(id(canonical), 0) + 1
+        return self._by_id[id(term)][1]
+
+    @staticmethod
+    def _terminal_key(term: IEquationTerm) -> tuple:
+        # the same looking terms of the different families are not interchangeable
+        return (
+            term.operator, term.keep_history, getattr(term, '_domain', None),
+            term.structural_key())
+
+    def repeated(self) -> list:
+        """
+        The (canonical term, count) -tuples of the terms seen more than once
+        """
+        return [
+            (canonical, self.counts[id(canonical)]) for canonical in self._by_key.values()
+            if self.counts.get(id(canonical), 0) > 1]
+
+        processed_term = term.processed_term
+        if processed_term is None:
+            key = term.structural_key()
+            canonical = self._by_key.setdefault(key, term)
+        else:
+            sink = self.canonical(processed_term.sink)
+            source = self.canonical(processed_term.source)
+            key = (processed_term.operation, id(sink), id(source))
+            canonical = self._by_key.get(key, None)
+            if canonical is None:
+                if sink is processed_term.sink and source is processed_term.source:
+                    canonical = term
+                elif processed_term.operation == CategoryOperations.ADD:
+                    canonical = sink + source
+                elif processed_term.operation == CategoryOperations.DISCARD:
+                    canonical = sink - source
+                else:
+                    canonical = sink * source
+                self._by_key[key] = canonical
+
+        self._by_id[id(term)] = (term, canonical)
+        self.counts[id(canonical)] = self.counts.get(id(canonical), 0) + 1
+        return canonical
@@ -1,5 +1,6 @@
 if __name__ == '__main__':
     import doctest
+    from array import array
     import category_equations
 
     # by importing these here, there might be some import errors left..
@@ -7,6 +8,7 @@ if __name__ == '__main__':
         'debug': category_equations.debug,
         'from_operator': category_equations.from_operator,
         'OperationsSet': category_equations.OperationsSet,
+        'FreezedOperation': category_equations.FreezedOperation,
         'Category': category_equations.Category,
         'CategoryOperations': category_equations.CategoryOperations,
         'ProcessedTerm': category_equations.ProcessedTerm,
@@ -16,13 +18,48 @@ if __name__ == '__main__':
         'Equal': category_equations.Equal,
         'EquationMap': category_equations.EquationMap,
         'simplify': category_equations.simplify,
+        'simplify_many': category_equations.simplify_many,
+        'simplify_components': category_equations.simplify_components,
+        'share_subterms': category_equations.share_subterms,
+        'SubtermTable': category_equations.SubtermTable,
         'get_route': category_equations.get_route,
-        'TermIs': category_equations.TermIs}
+        'TermIs': category_equations.TermIs,
+        'LRUCache': category_equations.LRUCache,
+        'NodeRange': category_equations.NodeRange,
+        'NodeArray': category_equations.NodeArray,
+        'BitSet': category_equations.BitSet,
+        'IntDomain': category_equations.IntDomain,
+        'BitOperationsSet': category_equations.BitOperationsSet,
+        'array': array,
+        'encode_term': category_equations.encode_term,
+        'decode_term': category_equations.decode_term,
+        'canonical_form': category_equations.canonical_form,
+        'term_digest': category_equations.term_digest,
+        'SimplificationStore': category_equations.SimplificationStore,
+        'synthesize': category_equations.synthesize,
+        'EvaluationPlan': category_equations.EvaluationPlan,
+        'compile_term': category_equations.compile_term,
+        'evaluate_many': category_equations.evaluate_many,
+        'EvaluationJournal': category_equations.EvaluationJournal,
+        'SearchStats': category_equations.SearchStats,
+        'EvaluationProfiler': category_equations.EvaluationProfiler,
+        'memory_report': category_equations.memory_report,
+        'trace_construction': category_equations.trace_construction}
     
     doctest.testfile(filename="operation.py", module_relative=True, package=category_equations, globs=globs)
     doctest.testfile(filename="category.py", module_relative=True, package=category_equations, globs=globs)
     doctest.testfile(filename="__init__.py", module_relative=True, package=category_equations, globs=globs)
     doctest.testfile(filename="term.py", module_relative=True, package=category_equations, globs=globs)
     doctest.testfile(filename="analysis.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="cache.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="nodes.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="encoding.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="store.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="synthesis.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="plan.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="evaluation.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="journal.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="instrumentation.py", module_relative=True, package=category_equations, globs=globs)
+    doctest.testfile(filename="memory.py", module_relative=True, package=category_equations, globs=globs)
 
     
\ No newline at end of file